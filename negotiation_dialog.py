@@ -22,13 +22,14 @@ import json
 import os
 import sqlite3
 import sys
+import threading
 import time
 import uuid
 from contextlib import contextmanager
 from compat_dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Database path
 DEFAULT_DB_DIR = Path.home() / ".tmux-monitor" / "memory"
@@ -147,15 +148,86 @@ class Dialog:
         return "\n".join(lines)
 
 
+class ConnectionPool:
+    """
+    SQLite connection pool: N read-only readers, one writer
+
+    Relies on WAL so readers never block on the writer. Reader slots are
+    gated by a semaphore; the single writer connection by a lock.
+    """
+
+    def __init__(self, db_path: Path, size: int = 4):
+        self.db_path = db_path
+        self._slots = threading.Semaphore(size)
+        self._idle: List[sqlite3.Connection] = []
+        self._idle_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect(str(db_path))
+        self._writer.execute("PRAGMA journal_mode=WAL")
+
+    def _connect(self, database: str, uri: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            database, timeout=10, uri=uri,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection"""
+        with self._slots:
+            with self._idle_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+                conn = self._connect(uri, uri=True)
+            try:
+                yield conn
+            finally:
+                with self._idle_lock:
+                    self._idle.append(conn)
+
+    @contextmanager
+    def writer(self):
+        """Take the writer connection; commits on success"""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._idle_lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle = []
+        with self._write_lock:
+            self._writer.close()
+
+
 class NegotiationDialog:
     """Negotiation dialog system"""
 
     # Default timeout in seconds
     DEFAULT_TIMEOUT = 300  # 5 minutes
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, pool_size: int = 0):
         self.db_path = db_path or DB_PATH
+        self._pool: Optional[ConnectionPool] = None
         self._ensure_db()
+        # Optional reader pool for concurrent, read-heavy callers
+        if pool_size > 0:
+            self._pool = ConnectionPool(self.db_path, pool_size)
+
+    def close(self):
+        """Release pooled connections, if any"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
 
     def _ensure_db(self):
         """Ensure database exists with proper schema"""
@@ -169,11 +241,11 @@ class NegotiationDialog:
                     priority TEXT DEFAULT 'medium',
                     title TEXT,
                     message TEXT NOT NULL,
-                    options TEXT,
-                    context TEXT,
+                    options JSON,
+                    context JSON,
                     status TEXT DEFAULT 'pending',
                     response TEXT,
-                    response_data TEXT,
+                    response_data JSON,
                     expires_at INTEGER,
                     created_at INTEGER NOT NULL,
                     responded_at INTEGER
@@ -186,8 +258,13 @@ class NegotiationDialog:
             """)
 
     @contextmanager
-    def _get_conn(self):
-        """Get database connection"""
+    def _get_conn(self, readonly: bool = False):
+        """Get database connection (pooled when a pool is configured)"""
+        if self._pool is not None:
+            with (self._pool.reader() if readonly else self._pool.writer()) as conn:
+                yield conn
+            return
+
         conn = sqlite3.connect(str(self.db_path), timeout=10)
         conn.row_factory = sqlite3.Row
         try:
@@ -196,9 +273,23 @@ class NegotiationDialog:
         finally:
             conn.close()
 
+    @staticmethod
+    def _json_column(value: Any, default: Any) -> Any:
+        """Decode a JSON column value; NULL, empty or corrupt values give the default.
+
+        Decoding is done here rather than through sqlite3.register_converter,
+        whose registration would apply to every sqlite3 user in the process.
+        """
+        if not value:
+            return default
+        try:
+            return json.loads(value) or default
+        except ValueError:
+            return default
+
     def _row_to_dialog(self, row: sqlite3.Row) -> Dialog:
         """Convert database row to Dialog object"""
-        options_data = json.loads(row["options"] or "[]")
+        options_data = self._json_column(row["options"], [])
         options = [
             DialogOption(
                 key=o.get("key", ""),
@@ -218,10 +309,10 @@ class NegotiationDialog:
             title=row["title"] or "",
             message=row["message"] or "",
             options=options,
-            context=json.loads(row["context"] or "{}"),
+            context=self._json_column(row["context"], {}),
             status=DialogStatus(row["status"] or "pending"),
             response=row["response"],
-            response_data=json.loads(row["response_data"] or "{}"),
+            response_data=self._json_column(row["response_data"], {}),
             expires_at=row["expires_at"],
             created_at=row["created_at"] or 0,
             responded_at=row["responded_at"],
@@ -241,7 +332,57 @@ class NegotiationDialog:
         timeout: int = DEFAULT_TIMEOUT
     ) -> Dialog:
         """Create a new dialog"""
-        dialog = Dialog(
+        dialog = self._build_dialog(
+            int(time.time()), session_id, dialog_type, message,
+            title, options, priority, context, timeout
+        )
+
+        self._save_dialog(dialog)
+        return dialog
+
+    def create_many(self, specs: List[Dict[str, Any]]) -> List[Dialog]:
+        """
+        Create several dialogs in one transaction
+
+        Each spec holds the keyword arguments accepted by create().
+        """
+        now = int(time.time())
+        dialogs = [
+            self._build_dialog(
+                now,
+                spec["session_id"],
+                spec["dialog_type"],
+                spec["message"],
+                spec.get("title", ""),
+                spec.get("options"),
+                spec.get("priority", DialogPriority.MEDIUM),
+                spec.get("context"),
+                spec.get("timeout", self.DEFAULT_TIMEOUT),
+            )
+            for spec in specs
+        ]
+
+        if dialogs:
+            with self._get_conn() as conn:
+                conn.executemany(
+                    self._SAVE_SQL, [self._dialog_params(d) for d in dialogs]
+                )
+        return dialogs
+
+    def _build_dialog(
+        self,
+        now: int,
+        session_id: str,
+        dialog_type: DialogType,
+        message: str,
+        title: str,
+        options: Optional[List[DialogOption]],
+        priority: DialogPriority,
+        context: Optional[Dict[str, Any]],
+        timeout: int
+    ) -> Dialog:
+        """Build a pending Dialog created at `now`"""
+        return Dialog(
             dialog_id=str(uuid.uuid4())[:8],
             session_id=session_id,
             dialog_type=dialog_type,
@@ -251,13 +392,10 @@ class NegotiationDialog:
             options=options or [],
             context=context or {},
             status=DialogStatus.PENDING,
-            expires_at=int(time.time()) + timeout if timeout > 0 else None,
-            created_at=int(time.time()),
+            expires_at=now + timeout if timeout > 0 else None,
+            created_at=now,
         )
 
-        self._save_dialog(dialog)
-        return dialog
-
     def _default_title(self, dialog_type: DialogType) -> str:
         """Get default title for dialog type"""
         titles = {
@@ -270,32 +408,39 @@ class NegotiationDialog:
         }
         return titles.get(dialog_type, "Dialog")
 
+    _SAVE_SQL = """
+        INSERT OR REPLACE INTO dialogs (
+            dialog_id, session_id, dialog_type, priority,
+            title, message, options, context, status,
+            response, response_data, expires_at,
+            created_at, responded_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
     def _save_dialog(self, dialog: Dialog):
         """Save dialog to database"""
         with self._get_conn() as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO dialogs (
-                    dialog_id, session_id, dialog_type, priority,
-                    title, message, options, context, status,
-                    response, response_data, expires_at,
-                    created_at, responded_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                dialog.dialog_id,
-                dialog.session_id,
-                dialog.dialog_type.value,
-                dialog.priority.value,
-                dialog.title,
-                dialog.message,
-                json.dumps([o.to_dict() for o in dialog.options]),
-                json.dumps(dialog.context),
-                dialog.status.value,
-                dialog.response,
-                json.dumps(dialog.response_data),
-                dialog.expires_at,
-                dialog.created_at,
-                dialog.responded_at,
-            ))
+            conn.execute(self._SAVE_SQL, self._dialog_params(dialog))
+
+    @staticmethod
+    def _dialog_params(dialog: Dialog) -> tuple:
+        """Bind parameters for _SAVE_SQL"""
+        return (
+            dialog.dialog_id,
+            dialog.session_id,
+            dialog.dialog_type.value,
+            dialog.priority.value,
+            dialog.title,
+            dialog.message,
+            json.dumps([o.to_dict() for o in dialog.options]),
+            json.dumps(dialog.context),
+            dialog.status.value,
+            dialog.response,
+            json.dumps(dialog.response_data),
+            dialog.expires_at,
+            dialog.created_at,
+            dialog.responded_at,
+        )
 
     # ==================== Convenience Creators ====================
 
@@ -543,7 +688,7 @@ class NegotiationDialog:
 
     def get(self, dialog_id: str) -> Optional[Dialog]:
         """Get a dialog by ID"""
-        with self._get_conn() as conn:
+        with self._get_conn(readonly=True) as conn:
             row = conn.execute(
                 "SELECT * FROM dialogs WHERE dialog_id = ?",
                 (dialog_id,)
@@ -555,7 +700,7 @@ class NegotiationDialog:
 
     def get_pending(self, session_id: str) -> List[Dialog]:
         """Get all pending dialogs for a session"""
-        with self._get_conn() as conn:
+        with self._get_conn(readonly=True) as conn:
             rows = conn.execute("""
                 SELECT * FROM dialogs
                 WHERE session_id = ? AND status = 'pending'
@@ -583,7 +728,7 @@ class NegotiationDialog:
         limit: int = 50
     ) -> List[Dialog]:
         """List dialogs for a session"""
-        with self._get_conn() as conn:
+        with self._get_conn(readonly=True) as conn:
             if status:
                 rows = conn.execute("""
                     SELECT * FROM dialogs
@@ -603,7 +748,7 @@ class NegotiationDialog:
 
     def get_response_stats(self, session_id: str) -> Dict[str, Any]:
         """Get response statistics for a session"""
-        with self._get_conn() as conn:
+        with self._get_conn(readonly=True) as conn:
             total = conn.execute("""
                 SELECT COUNT(*) as count FROM dialogs WHERE session_id = ?
             """, (session_id,)).fetchone()["count"]
@@ -6,6 +6,7 @@ Claude Monitor Notification Hub
 
 Usage:
     python3 notification_hub.py send <event_type> <title> <message> [--context JSON]
+    python3 notification_hub.py daemon
     python3 notification_hub.py test [channel]
     python3 notification_hub.py config show
     python3 notification_hub.py config set <key> <value>
@@ -20,13 +21,20 @@ Event Types:
     goal_drift          - 目标偏离
 """
 
-import argparse
+import atexit
+import hashlib
 import json
 import os
 import platform
+import queue
+import re
+import shutil
+import socket
 import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict, deque
 from pathlib import Path
 
 try:
@@ -34,14 +42,41 @@ try:
 except ImportError:
     pass
 
+# 运行平台（进程内不变，加载时确定一次）
+_SYSTEM = platform.system()
+
+# 可选依赖：urllib3 连接池（复用 keep-alive 连接）
+try:
+    import urllib3
+    URLLIB3_AVAILABLE = True
+except ImportError:
+    URLLIB3_AVAILABLE = False
+
+# 可选依赖：jeepney（纯 Python D-Bus 客户端，免去 notify-send 进程）
+try:
+    from jeepney import DBusAddress, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+    JEEPNEY_AVAILABLE = True
+except ImportError:
+    JEEPNEY_AVAILABLE = False
+
 # 默认配置
 DEFAULT_CONFIG_DIR = Path.home() / ".tmux-monitor" / "config"
 DEFAULT_CONFIG_PATH = DEFAULT_CONFIG_DIR / "notification.json"
 
 # 环境变量
 CONFIG_PATH = Path(os.environ.get("AI_MONITOR_NOTIFICATION_CONFIG", str(DEFAULT_CONFIG_PATH)))
+SOCKET_PATH = Path(os.environ.get(
+    "AI_MONITOR_NOTIFICATION_SOCKET",
+    str(Path.home() / ".tmux-monitor" / "notification.sock")
+))
 NOTIFICATION_ENABLED = os.environ.get("AI_MONITOR_NOTIFICATION_ENABLED", "0") == "1"
 
+# 常驻进程读取单个请求的超时（秒），避免不关闭写端的客户端阻塞整个进程
+DAEMON_CONN_TIMEOUT = 1.0
+# 请求已送达常驻进程、但未等到响应时 send_via_daemon 返回的渠道占位
+DAEMON_QUEUED = "queued"
+
 # 事件严重级别映射
 EVENT_SEVERITY = {
     "dangerous_operation": "critical",
@@ -53,6 +88,34 @@ EVENT_SEVERITY = {
     "goal_drift": "warning"
 }
 
+# 严重级别评分（推送门限判定）
+SEVERITY_SCORE = {
+    "critical": 1.0,
+    "error": 0.8,
+    "warning": 0.4,
+    "info": 0.1
+}
+
+# 高影响级别：无视评分门限，但仍受限流与防抖约束
+HIGH_IMPACT_SEVERITIES = frozenset(("critical", "error"))
+
+# D-Bus 连接失败后，多久内不再重连（秒）
+DBUS_RETRY_SECONDS = 30
+
+# 推送限流窗口（秒）
+RATE_WINDOW_SECONDS = 60
+
+# Webhook 超时（秒）与默认重试次数
+WEBHOOK_CONNECT_TIMEOUT = 3
+WEBHOOK_READ_TIMEOUT = 3
+WEBHOOK_RETRY_TOTAL = 3
+
+# 后台发送队列容量（队列满时丢弃新事件）
+DISPATCH_QUEUE_SIZE = 256
+
+# 防抖记录上限（LRU 淘汰，避免长时间运行时无限增长）
+MAX_THROTTLE_ENTRIES = 4096
+
 
 class NotificationEvent:
     """通知事件"""
@@ -68,12 +131,24 @@ class NotificationEvent:
 class DesktopNotifier:
     """桌面通知器 - Linux/macOS"""
 
+    # Linux 通知后端（notify-send / zenity / wall），首次发送时探测并缓存
+    _linux_backend = None
+
+    # 进程内共享的 session bus 连接（None 表示未连接），由发送线程与合并定时器线程共用，
+    # 用 _dbus_lock 串行化；连接失败后 DBUS_RETRY_SECONDS 内直接走 notify-send
+    _dbus_conn = None
+    _dbus_lock = threading.Lock()
+    _dbus_retry_at = 0.0
+
+    # notify-send urgency -> D-Bus urgency hint
+    _DBUS_URGENCY = {"low": 0, "normal": 1, "critical": 2}
+
     def __init__(self, config=None):
         self.config = config or {}
 
     def send(self, event):
         """发送桌面通知"""
-        system = platform.system()
+        system = _SYSTEM
         title = event.title
         message = event.message
         urgency = self._map_urgency(event.severity)
@@ -93,6 +168,19 @@ class DesktopNotifier:
             print("[notification] Error sending desktop notification: {}".format(e), file=sys.stderr)
             return False
 
+    def send_batch(self, events):
+        """合并同一严重级别的多个事件为一条桌面通知"""
+        if len(events) == 1:
+            return self.send(events[0])
+
+        merged = NotificationEvent(
+            event_type=events[0].event_type,
+            title="Claude Monitor: {} notifications".format(len(events)),
+            message="\n".join("{}: {}".format(e.title, e.message) for e in events),
+            severity=events[0].severity
+        )
+        return self.send(merged)
+
     def _send_macos(self, title, message):
         """macOS 通知"""
         # 转义特殊字符
@@ -104,21 +192,28 @@ class DesktopNotifier:
                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
     def _send_linux(self, title, message, urgency):
-        """Linux 通知 (notify-send)"""
-        # 检查 notify-send 是否可用
-        result = subprocess.run(['which', 'notify-send'],
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        if result.returncode != 0:
-            # 尝试 zenity
-            result = subprocess.run(['which', 'zenity'],
-                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            if result.returncode == 0:
-                subprocess.run([
-                    'zenity', '--notification',
-                    '--text={}: {}'.format(title, message)
-                ], check=False)
-                return
+        """Linux 通知（优先 D-Bus，其次 notify-send）"""
+        if self._send_dbus(title, message, urgency):
+            return
 
+        backend = DesktopNotifier._linux_backend
+        if backend is None:
+            if shutil.which('notify-send'):
+                backend = 'notify-send'
+            elif shutil.which('zenity'):
+                backend = 'zenity'
+            else:
+                backend = 'wall'
+            DesktopNotifier._linux_backend = backend
+
+        if backend == 'zenity':
+            subprocess.run([
+                'zenity', '--notification',
+                '--text={}: {}'.format(title, message)
+            ], check=False)
+            return
+
+        if backend == 'wall':
             print("[notification] notify-send not found, trying wall", file=sys.stderr)
             # 降级到 wall
             subprocess.run(['wall', '{}: {}'.format(title, message)],
@@ -135,6 +230,41 @@ class DesktopNotifier:
         ]
         subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
+    def _send_dbus(self, title, message, urgency):
+        """通过 org.freedesktop.Notifications 直接发送，失败返回 False"""
+        if not JEEPNEY_AVAILABLE:
+            return False
+
+        with DesktopNotifier._dbus_lock:
+            if DesktopNotifier._dbus_conn is None and time.monotonic() < DesktopNotifier._dbus_retry_at:
+                return False
+            try:
+                if DesktopNotifier._dbus_conn is None:
+                    DesktopNotifier._dbus_conn = open_dbus_connection(bus='SESSION')
+                address = DBusAddress(
+                    '/org/freedesktop/Notifications',
+                    bus_name='org.freedesktop.Notifications',
+                    interface='org.freedesktop.Notifications'
+                )
+                msg = new_method_call(address, 'Notify', 'susssasa{sv}i', (
+                    'Claude Monitor', 0, self._get_icon(urgency), title, message,
+                    [], {'urgency': ('y', self._DBUS_URGENCY.get(urgency, 1))}, -1
+                ))
+                DesktopNotifier._dbus_conn.send_and_get_reply(msg, timeout=3)
+                return True
+            except Exception as e:
+                print("[notification] D-Bus unavailable, using notify-send: {}".format(e),
+                      file=sys.stderr)
+                # 丢弃可能已损坏的连接，退避后重连
+                if DesktopNotifier._dbus_conn is not None:
+                    try:
+                        DesktopNotifier._dbus_conn.close()
+                    except Exception:
+                        pass
+                DesktopNotifier._dbus_conn = None
+                DesktopNotifier._dbus_retry_at = time.monotonic() + DBUS_RETRY_SECONDS
+                return False
+
     def _map_urgency(self, severity):
         """映射严重级别到 notify-send urgency"""
         mapping = {
@@ -165,14 +295,104 @@ class DesktopNotifier:
         return self.send(event)
 
 
+# Webhook 模板占位符
+_PLACEHOLDER_RE = re.compile(r'\$\{(event_type|title|message|severity|timestamp)\}')
+# JSON 字符串或字符串外的裸占位符（如 "ts": ${timestamp}）
+_TEMPLATE_TOKEN_RE = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\$\{(event_type|title|message|severity|timestamp)\}'
+)
+
+
+class _TemplateSlot(object):
+    """模板中含占位符的字符串叶子节点"""
+    __slots__ = ('text', 'raw_field')
+
+    def __init__(self, text, raw_field=None):
+        self.text = text
+        self.raw_field = raw_field  # 裸占位符：直接取字段原值（保持数字类型）
+
+    def render(self, values):
+        if self.raw_field:
+            return values[self.raw_field]
+        return _PLACEHOLDER_RE.sub(lambda m: str(values[m.group(1)]), self.text)
+
+
+# 裸占位符在解析前被转成以此开头的 JSON 字符串
+_RAW_MARKER = '\x00'
+
+
+def _compile_template(template):
+    """将 webhook 模板解析为结构化对象，占位符所在叶子替换为 _TemplateSlot"""
+    if isinstance(template, str):
+        def quote_bare(match):
+            if match.group(1) is None:
+                return match.group(0)
+            return json.dumps(_RAW_MARKER + match.group(1))
+
+        template = json.loads(_TEMPLATE_TOKEN_RE.sub(quote_bare, template))
+
+    def compile_node(node):
+        if isinstance(node, dict):
+            return {k: compile_node(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [compile_node(v) for v in node]
+        if isinstance(node, str):
+            if node.startswith(_RAW_MARKER):
+                return _TemplateSlot(node, node[len(_RAW_MARKER):])
+            if '${' in node:
+                return _TemplateSlot(node)
+        return node
+
+    return compile_node(template)
+
+
+def _fill_template(node, values):
+    """按事件字段填充已编译模板"""
+    if isinstance(node, dict):
+        return {k: _fill_template(v, values) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_fill_template(v, values) for v in node]
+    if isinstance(node, _TemplateSlot):
+        return node.render(values)
+    return node
+
+
+def _webhook_retry(total):
+    """Webhook 重试策略：5xx 与连接错误指数退避重试，遵循 Retry-After"""
+    kwargs = dict(
+        total=total,
+        status_forcelist=(500, 502, 503, 504),
+        backoff_factor=0.3,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    try:
+        # POST 默认不在可重试方法内，显式放开
+        return urllib3.Retry(allowed_methods=None, **kwargs)
+    except TypeError:  # urllib3 < 1.26
+        return urllib3.Retry(method_whitelist=None, **kwargs)
+
+
 class WebhookNotifier:
     """Webhook 通知器"""
 
+    # 进程内共享的连接池（多个 NotificationHub 复用同一组 keep-alive 连接）
+    _pool = None
+
     def __init__(self, config):
         self.url = config.get('url', '')
         self.method = config.get('method', 'POST')
         self.headers = config.get('headers', {})
+        self.retry_total = int(config.get('retry_total', WEBHOOK_RETRY_TOTAL))
+        self._retries = _webhook_retry(self.retry_total) if URLLIB3_AVAILABLE else None
         self.template = config.get('template')
+        self._template_obj = None
+        if self.template:
+            try:
+                self._template_obj = _compile_template(self.template)
+            except (ValueError, TypeError) as e:
+                print("[notification] Invalid webhook template, using default payload: {}".format(e),
+                      file=sys.stderr)
 
     def send(self, event):
         """发送 Webhook 通知"""
@@ -181,35 +401,55 @@ class WebhookNotifier:
             return False
 
         try:
-            import urllib.request
-            import urllib.error
-
             payload = self._render_payload(event)
             data = json.dumps(payload).encode('utf-8')
 
             headers = {'Content-Type': 'application/json'}
             headers.update(self.headers)
 
+            pool = self._get_pool()
+            if pool is not None:
+                resp = pool.request(self.method, self.url, body=data, headers=headers,
+                                    retries=self._retries)
+                return resp.status < 400
+
+            import urllib.request
+
             req = urllib.request.Request(self.url, data=data, headers=headers, method=self.method)
 
-            with urllib.request.urlopen(req, timeout=10) as resp:
+            with urllib.request.urlopen(req, timeout=WEBHOOK_CONNECT_TIMEOUT + WEBHOOK_READ_TIMEOUT) as resp:
                 return resp.status < 400
 
         except Exception as e:
             print("[notification] Webhook error: {}".format(e), file=sys.stderr)
             return False
 
+    @classmethod
+    def _get_pool(cls):
+        """获取共享连接池（urllib3 不可用时返回 None）"""
+        if not URLLIB3_AVAILABLE:
+            return None
+        if WebhookNotifier._pool is None:
+            pool = urllib3.PoolManager(
+                num_pools=4,
+                maxsize=16,
+                retries=_webhook_retry(WEBHOOK_RETRY_TOTAL),
+                timeout=urllib3.Timeout(connect=WEBHOOK_CONNECT_TIMEOUT, read=WEBHOOK_READ_TIMEOUT)
+            )
+            atexit.register(pool.clear)
+            WebhookNotifier._pool = pool
+        return WebhookNotifier._pool
+
     def _render_payload(self, event):
         """渲染 payload"""
-        if self.template:
-            # 简单模板替换
-            payload_str = self.template
-            payload_str = payload_str.replace("${event_type}", event.event_type)
-            payload_str = payload_str.replace("${title}", event.title)
-            payload_str = payload_str.replace("${message}", event.message)
-            payload_str = payload_str.replace("${severity}", event.severity)
-            payload_str = payload_str.replace("${timestamp}", str(event.timestamp))
-            return json.loads(payload_str)
+        if self._template_obj is not None:
+            return _fill_template(self._template_obj, {
+                "event_type": event.event_type,
+                "title": event.title,
+                "message": event.message,
+                "severity": event.severity,
+                "timestamp": event.timestamp
+            })
 
         return {
             "event_type": event.event_type,
@@ -235,12 +475,31 @@ class WebhookNotifier:
 class NotificationHub:
     """通知中心"""
 
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, config=None):
         self.config_path = config_path or CONFIG_PATH
-        self.config = self._load_config()
+        self.config = config if config is not None else self._load_config()
         self.notifiers = self._init_notifiers()
-        self.last_notify_time = {}  # 防抖
+        # 防抖: dedup key -> {"t": 最近发送时间(monotonic), "n": 此后被抑制的重复次数}
+        self.last_notify_time = OrderedDict()
+        # 防抖窗口已过期、但仍有未报告抑制次数的记录: dedup key -> n
+        self._suppressed = OrderedDict()
         self.throttle_seconds = self.config.get('throttle_seconds', 60)
+        # 未配置门限时不按评分拦截，保持旧配置订阅的低级别事件照常推送
+        self.score_threshold = self.config.get('score_threshold', 0.0)
+        self.rate_limit = self.config.get('rate_limit_per_minute', 20)  # 0 表示不限
+        self._recent_pushes = deque()  # 最近一个限流窗口内的推送时间(monotonic)
+        self._precompute_quiet()
+
+        # 突发事件合并：窗口内的事件按 (渠道, 严重级别) 合并为一次发送，0 表示关闭
+        self.coalesce_seconds = self.config.get('coalesce_ms', 0) / 1000.0
+        self._pending = []  # [(channel_type, notifier, event)]
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+
+        # 后台发送线程（首次 notify() 时启动）
+        self._q = queue.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+        self._worker_thread = None
+        self._worker_lock = threading.Lock()
 
     def _load_config(self):
         """加载配置"""
@@ -254,11 +513,14 @@ class NotificationHub:
         # 默认配置
         return self._get_default_config()
 
-    def _get_default_config(self):
+    @staticmethod
+    def _get_default_config():
         """获取默认配置"""
         return {
             "enabled": True,
             "throttle_seconds": 60,
+            "score_threshold": 0.4,
+            "rate_limit_per_minute": 20,
             "quiet_hours": {
                 "enabled": True,
                 "start": "23:00",
@@ -274,7 +536,7 @@ class NotificationHub:
         }
 
     def _init_notifiers(self):
-        """初始化通知器"""
+        """初始化通知器：channel_type -> (notifier, 订阅事件集合, 是否订阅全部)"""
         notifiers = {}
 
         for channel in self.config.get('channels', []):
@@ -282,88 +544,483 @@ class NotificationHub:
                 continue
 
             channel_type = channel.get('type')
-            events = channel.get('events', ['*'])
+            events = frozenset(channel.get('events', ['*']))
+            wildcard = '*' in events
 
             if channel_type == 'desktop':
-                notifiers[channel_type] = (DesktopNotifier(channel.get('config')), events)
+                notifiers[channel_type] = (DesktopNotifier(channel.get('config')), events, wildcard)
             elif channel_type == 'webhook':
-                notifiers[channel_type] = (WebhookNotifier(channel.get('config', {})), events)
+                notifiers[channel_type] = (WebhookNotifier(channel.get('config', {})), events, wildcard)
             # 可扩展更多通知器
 
         return notifiers
 
-    def notify(self, event):
-        """发送通知，返回成功的渠道列表"""
+    def notify(self, event, force=False):
+        """
+        异步发送通知：检查通过后交给后台线程发送
+
+        返回已排队的渠道列表（不代表发送成功）。force 时忽略静默时段/限流/防抖。
+        """
+        eligible = self._admit(event, force)
+        if not eligible:
+            return []
+
+        self._ensure_worker()
+        try:
+            self._q.put_nowait((event, eligible))
+        except queue.Full:
+            print("[notification] Dispatch queue full, dropping event: {}".format(event.event_type),
+                  file=sys.stderr)
+            return []
+
+        return [channel_type for channel_type, _ in eligible]
+
+    def notify_sync(self, event, force=False):
+        """同步发送通知，返回成功的渠道列表（不经过合并队列，返回前已发送完毕）"""
+        eligible = self._admit(event, force)
+        if not eligible:
+            return []
+        return self._send_now(event, eligible)
+
+    def _admit(self, event, force=False):
+        """
+        执行开关/静默时段/限流/防抖检查
+
+        通过时记录本次推送并返回订阅该事件的 [(channel_type, notifier)]，否则返回空列表。
+        """
         if not self.config.get('enabled', True):
             return []
 
+        # 没有渠道订阅该事件时，跳过后续检查与去重键计算
+        eligible = [
+            (channel_type, notifier)
+            for channel_type, (notifier, events, wildcard) in self.notifiers.items()
+            if wildcard or event.event_type in events
+        ]
+        if not eligible:
+            return []
+
         # 检查静默时段
-        if self._is_quiet_hours():
+        if not force and self._is_quiet_hours():
             return []
 
         # 防抖检查
-        key = "{}:{}".format(event.event_type, event.context.get('target', ''))
-        if self._is_throttled(key):
+        # 限流/防抖只做时间差比较，用单调时钟避免系统时间调整的影响
+        now = time.monotonic()
+        if not self._allow_push(event, now, force):
             return []
 
-        sent_channels = []
-        for channel_type, (notifier, events) in self.notifiers.items():
-            if '*' in events or event.event_type in events:
-                if notifier.send(event):
-                    sent_channels.append(channel_type)
+        self._purge_expired(now)
+        key = self._dedup_key(event)
+        entry = self.last_notify_time.get(key)
+        if entry is not None and not force and self._is_throttled(key, now):
+            # 窗口内的重复事件只计数，下次发送时一并报告
+            entry["n"] += 1
+            return []
+
+        suppressed = self._suppressed.pop(key, 0) + (entry["n"] if entry else 0)
+        if suppressed:
+            event.message = "{} (+{} similar)".format(event.message, suppressed)
 
-        if sent_channels:
-            self.last_notify_time[key] = time.time()
+        self._record_notify(key, now)
+        self._recent_pushes.append(now)
+        return eligible
 
+    def _deliver(self, event, eligible):
+        """发送（或加入合并队列），返回成功/已排队的渠道列表"""
+        if self.coalesce_seconds > 0:
+            return self._enqueue(event, eligible)
+        return self._send_now(event, eligible)
+
+    @staticmethod
+    def _send_now(event, eligible):
+        """立即逐个渠道发送，返回成功的渠道列表"""
+        sent_channels = []
+        for channel_type, notifier in eligible:
+            if notifier.send(event):
+                sent_channels.append(channel_type)
         return sent_channels
 
-    def _is_quiet_hours(self):
-        """检查是否在静默时段"""
-        quiet = self.config.get('quiet_hours', {})
-        if not quiet.get('enabled', False):
+    def _ensure_worker(self):
+        """按需启动后台发送线程"""
+        with self._worker_lock:
+            if self._worker_thread is None:
+                self._worker_thread = threading.Thread(
+                    target=self._worker, name='notification-dispatch', daemon=True
+                )
+                self._worker_thread.start()
+
+    def _worker(self):
+        """后台线程：逐个取出事件并发送"""
+        while True:
+            event, eligible = self._q.get()
+            try:
+                self._deliver(event, eligible)
+            except Exception as e:
+                print("[notification] Dispatch error: {}".format(e), file=sys.stderr)
+            finally:
+                self._q.task_done()
+
+    def join(self):
+        """等待后台队列中的事件发送完毕"""
+        self._q.join()
+
+    def _enqueue(self, event, eligible):
+        """加入待合并队列，返回已排队的渠道列表"""
+        with self._pending_lock:
+            for channel_type, notifier in eligible:
+                self._pending.append((channel_type, notifier, event))
+
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.coalesce_seconds, self.flush)
+                self._flush_timer.start()
+        return [channel_type for channel_type, _ in eligible]
+
+    def flush(self):
+        """发送所有待合并事件，每个 (渠道, 严重级别) 分组一次发送"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        groups = OrderedDict()
+        for channel_type, notifier, event in pending:
+            groups.setdefault((channel_type, event.severity), (notifier, []))[1].append(event)
+
+        for notifier, events in groups.values():
+            send_batch = getattr(notifier, 'send_batch', None)
+            if send_batch is not None:
+                send_batch(events)
+            else:
+                for event in events:
+                    notifier.send(event)
+
+    def _allow_push(self, event, now, force=False):
+        """推送判定：force 时直接放行，否则需未超出限流，且评分达到门限或属于高影响级别"""
+        recent = self._recent_pushes
+        while recent and recent[0] < now - RATE_WINDOW_SECONDS:
+            recent.popleft()
+        if force:
+            return True
+        if self.rate_limit and len(recent) >= self.rate_limit:
             return False
 
-        try:
-            now = time.localtime()
-            current_minutes = now.tm_hour * 60 + now.tm_min
+        score = SEVERITY_SCORE.get(event.severity, 0.0)
+        return score >= self.score_threshold or event.severity in HIGH_IMPACT_SEVERITIES
+
+    @staticmethod
+    def _dedup_key(event):
+        """按事件内容计算去重键（相同内容的事件视为重复）"""
+        canonical = json.dumps({
+            "t": event.event_type,
+            "ti": event.title,
+            "m": event.message,
+            "c": event.context
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _purge_expired(self, now):
+        """清理已超出防抖窗口的记录（按发送时间有序，只需检查队首）"""
+        cutoff = now - self.throttle_seconds
+        while self.last_notify_time and next(iter(self.last_notify_time.values()))["t"] < cutoff:
+            key, entry = self.last_notify_time.popitem(last=False)
+            if entry["n"]:
+                # 保留抑制次数，待同一事件再次发送时报告
+                self._suppressed[key] = entry["n"]
+                while len(self._suppressed) > MAX_THROTTLE_ENTRIES:
+                    self._suppressed.popitem(last=False)
+
+    def _record_notify(self, key, ts):
+        """记录发送时间并重置抑制计数，超出上限时淘汰最久未发送的记录"""
+        self.last_notify_time[key] = {"t": ts, "n": 0}
+        self.last_notify_time.move_to_end(key)
+        while len(self.last_notify_time) > MAX_THROTTLE_ENTRIES:
+            self.last_notify_time.popitem(last=False)
+
+    def _precompute_quiet(self):
+        """预先解析静默时段为分钟数（配置加载时执行一次）"""
+        quiet = self.config.get('quiet_hours', {})
+        self._quiet_enabled = bool(quiet.get('enabled', False))
+        self._quiet_start_min = 0
+        self._quiet_end_min = 0
+        if not self._quiet_enabled:
+            return
 
+        try:
             start_parts = quiet.get('start', '23:00').split(':')
-            start_minutes = int(start_parts[0]) * 60 + int(start_parts[1])
-
             end_parts = quiet.get('end', '08:00').split(':')
-            end_minutes = int(end_parts[0]) * 60 + int(end_parts[1])
-
-            if start_minutes > end_minutes:
-                # 跨午夜
-                return current_minutes >= start_minutes or current_minutes < end_minutes
-            else:
-                return start_minutes <= current_minutes < end_minutes
+            self._quiet_start_min = int(start_parts[0]) * 60 + int(start_parts[1])
+            self._quiet_end_min = int(end_parts[0]) * 60 + int(end_parts[1])
+        except (ValueError, IndexError, AttributeError) as e:
+            print("[notification] Invalid quiet_hours config, disabled: {}".format(e),
+                  file=sys.stderr)
+            self._quiet_enabled = False
 
-        except Exception:
+    def _is_quiet_hours(self):
+        """检查是否在静默时段"""
+        if not self._quiet_enabled:
             return False
 
-    def _is_throttled(self, key):
+        now = time.localtime()
+        current_minutes = now.tm_hour * 60 + now.tm_min
+        start, end = self._quiet_start_min, self._quiet_end_min
+        if start > end:
+            # 跨午夜
+            return current_minutes >= start or current_minutes < end
+        return start <= current_minutes < end
+
+    def _is_throttled(self, key, now=None):
         """检查是否被限流"""
-        last_time = self.last_notify_time.get(key, 0)
-        return (time.time() - last_time) < self.throttle_seconds
+        entry = self.last_notify_time.get(key)
+        if entry is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        return (now - entry["t"]) < self.throttle_seconds
 
     def test_all(self):
         """测试所有通知渠道"""
         results = {}
-        for channel_type, (notifier, _) in self.notifiers.items():
+        for channel_type, (notifier, _, _) in self.notifiers.items():
             results[channel_type] = notifier.test()
         return results
 
     def save_config(self):
         """保存配置"""
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(str(self.config_path), 'w') as f:
+        # 先写临时文件再原子替换，避免中途崩溃留下损坏的配置
+        tmp_path = self.config_path.with_suffix('.json.tmp')
+        with open(str(tmp_path), 'w') as f:
             json.dump(self.config, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(str(tmp_path), str(self.config_path))
+
+
+# ==================== 常驻进程 ====================
+
+def _recv_all(conn):
+    """读取直到对端关闭写端"""
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def _daemon_listening(socket_path):
+    """socket 文件上是否有常驻进程在监听；连接被拒绝说明是残留文件"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def serve(hub, socket_path=None):
+    """
+    常驻进程：在 Unix socket 上接收事件并交给 hub 发送
+
+    请求为 {"event_type", "title", "message", "context", "force"}，
+    响应为 {"channels": [...]}（已排队的渠道）。
+    """
+    socket_path = Path(socket_path or SOCKET_PATH)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        # 只清理残留文件，不接管仍在运行的常驻进程
+        if _daemon_listening(socket_path):
+            raise RuntimeError("daemon already listening on {}".format(socket_path))
+        socket_path.unlink()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(str(socket_path))
+    except OSError:
+        server.close()
+        raise
+    try:
+        os.chmod(str(socket_path), 0o600)
+        server.listen(16)
+
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                conn.settimeout(DAEMON_CONN_TIMEOUT)
+                try:
+                    payload = _recv_all(conn)
+                except OSError:
+                    # 客户端未在超时内发完请求，丢弃该连接
+                    continue
+                if not payload:
+                    # 探测连接（见 _daemon_listening）不带请求，直接关闭
+                    continue
+                try:
+                    request = json.loads(payload.decode('utf-8'))
+                    event = NotificationEvent(
+                        event_type=request['event_type'],
+                        title=request.get('title', ''),
+                        message=request.get('message', ''),
+                        context=request.get('context') or {}
+                    )
+                    channels = hub.notify(event, force=bool(request.get('force')))
+                    response = {"channels": channels}
+                except Exception as e:
+                    response = {"channels": [], "error": str(e)}
+                try:
+                    conn.sendall(json.dumps(response).encode('utf-8'))
+                except OSError:
+                    # 客户端已超时断开，不影响后续请求
+                    pass
+    finally:
+        server.close()
+        if socket_path.exists():
+            socket_path.unlink()
+
+
+def send_via_daemon(request, socket_path=None, timeout=2.0):
+    """
+    通过常驻进程发送事件
+
+    返回已排队的渠道列表；常驻进程不可用时返回 None。
+    请求已送达但未收到响应时返回 [DAEMON_QUEUED]，调用方不应再自行发送，以免重复通知。
+    """
+    socket_path = Path(socket_path or SOCKET_PATH)
+    if not hasattr(socket, 'AF_UNIX') or not socket_path.exists():
+        return None
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        try:
+            client.connect(str(socket_path))
+            client.sendall(json.dumps(request).encode('utf-8'))
+            client.shutdown(socket.SHUT_WR)
+        except OSError:
+            return None
+        try:
+            response = json.loads(_recv_all(client).decode('utf-8'))
+        except (OSError, ValueError):
+            return [DAEMON_QUEUED]
+    finally:
+        client.close()
+
+    return response.get('channels', [])
 
 
 # ==================== CLI 入口 ====================
 
+def _cmd_send(args):
+    context = json.loads(args.context) if args.context else {}
+
+    # 优先交给常驻进程，省去解释器启动与配置解析
+    channels = send_via_daemon({
+        "event_type": args.event_type,
+        "title": args.title,
+        "message": args.message,
+        "context": context,
+        "force": args.force
+    })
+    if channels is None:
+        event = NotificationEvent(
+            event_type=args.event_type,
+            title=args.title,
+            message=args.message,
+            context=context
+        )
+        channels = NotificationHub().notify_sync(event, force=args.force)
+
+    if channels == [DAEMON_QUEUED]:
+        print("Notification queued by daemon")
+    elif channels:
+        print("Notification sent to: {}".format(', '.join(channels)))
+    else:
+        print("No notification sent (throttled, quiet hours, or no channels enabled)")
+    return 0
+
+
+def _cmd_daemon(args):
+    try:
+        serve(NotificationHub())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def _cmd_test(args):
+    hub = NotificationHub()
+    if args.channel:
+        if args.channel in hub.notifiers:
+            notifier = hub.notifiers[args.channel][0]
+            success = notifier.test()
+            print("{}: {}".format(args.channel, "✅ OK" if success else "❌ Failed"))
+        else:
+            print("Channel '{}' not found. Available: {}".format(
+                args.channel, ', '.join(hub.notifiers.keys())))
+            return 1
+    else:
+        results = hub.test_all()
+        for channel, success in results.items():
+            print("{}: {}".format(channel, "✅ OK" if success else "❌ Failed"))
+
+        if not results:
+            print("No channels configured. Run 'notification_hub.py config init' first.")
+    return 0
+
+
+# config set 支持的键及其类型转换
+_CONFIG_SETTERS = {
+    'enabled': lambda value: value.lower() in ('true', '1', 'yes'),
+    'throttle_seconds': int,
+    'score_threshold': float,
+    'rate_limit_per_minute': int,
+    'coalesce_ms': int
+}
+
+
+def _cmd_config(args):
+    if args.config_cmd == 'init':
+        # 直接写入默认配置，无需读取现有配置
+        hub = NotificationHub(config=NotificationHub._get_default_config())
+        hub.save_config()
+        print("Default config created at: {}".format(hub.config_path))
+
+    elif args.config_cmd == 'show':
+        print(json.dumps(NotificationHub().config, indent=2, ensure_ascii=False))
+
+    elif args.config_cmd == 'set':
+        # 简单的配置设置
+        setter = _CONFIG_SETTERS.get(args.key)
+        if setter is None:
+            print("Unknown config key: {}".format(args.key))
+            return 1
+
+        hub = NotificationHub()
+        hub.config[args.key] = setter(args.value)
+        hub.save_config()
+        print("Config updated: {} = {}".format(args.key, args.value))
+
+    else:
+        args.config_parser.print_help()
+    return 0
+
+
+_COMMANDS = {
+    'send': _cmd_send,
+    'daemon': _cmd_daemon,
+    'test': _cmd_test,
+    'config': _cmd_config
+}
+
+
 def main(argv=None):
+    import argparse  # 仅 CLI 需要，避免作为模块导入时的开销
+
     parser = argparse.ArgumentParser(
         description='Claude Monitor Notification Hub',
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -378,97 +1035,36 @@ def main(argv=None):
     p_send.add_argument('--context', help='JSON context', default='{}')
     p_send.add_argument('--force', action='store_true', help='Ignore throttle and quiet hours')
 
+    # daemon
+    subparsers.add_parser('daemon', help='Serve send requests on a Unix socket')
+
     # test
     p_test = subparsers.add_parser('test', help='Test notification channels')
     p_test.add_argument('channel', nargs='?', help='Channel to test (default: all)')
 
     # config
     p_config = subparsers.add_parser('config', help='Manage configuration')
+    p_config.set_defaults(config_parser=p_config)
     config_sub = p_config.add_subparsers(dest='config_cmd')
     config_sub.add_parser('show', help='Show current config')
     p_set = config_sub.add_parser('set', help='Set a config value')
-    p_set.add_argument('key', help='Config key (e.g., enabled, throttle_seconds)')
+    p_set.add_argument('key', help='Config key (e.g., enabled, throttle_seconds, score_threshold)')
     p_set.add_argument('value', help='Config value')
     config_sub.add_parser('init', help='Create default config file')
 
     args = parser.parse_args(argv)
 
-    # 初始化
-    hub = NotificationHub()
+    handler = _COMMANDS.get(args.command)
+    if handler is None:
+        parser.print_help()
+        return 1
 
     try:
-        if args.command == 'send':
-            context = json.loads(args.context) if args.context else {}
-            event = NotificationEvent(
-                event_type=args.event_type,
-                title=args.title,
-                message=args.message,
-                context=context
-            )
-
-            if args.force:
-                hub.throttle_seconds = 0
-                hub.config['quiet_hours']['enabled'] = False
-
-            channels = hub.notify(event)
-            if channels:
-                print("Notification sent to: {}".format(', '.join(channels)))
-            else:
-                print("No notification sent (throttled, quiet hours, or no channels enabled)")
-
-        elif args.command == 'test':
-            if args.channel:
-                if args.channel in hub.notifiers:
-                    notifier, _ = hub.notifiers[args.channel]
-                    success = notifier.test()
-                    print("{}: {}".format(args.channel, "✅ OK" if success else "❌ Failed"))
-                else:
-                    print("Channel '{}' not found. Available: {}".format(
-                        args.channel, ', '.join(hub.notifiers.keys())))
-                    return 1
-            else:
-                results = hub.test_all()
-                for channel, success in results.items():
-                    print("{}: {}".format(channel, "✅ OK" if success else "❌ Failed"))
-
-                if not results:
-                    print("No channels configured. Run 'notification_hub.py config init' first.")
-
-        elif args.command == 'config':
-            if args.config_cmd == 'show':
-                print(json.dumps(hub.config, indent=2, ensure_ascii=False))
-
-            elif args.config_cmd == 'set':
-                # 简单的配置设置
-                if args.key == 'enabled':
-                    hub.config['enabled'] = args.value.lower() in ('true', '1', 'yes')
-                elif args.key == 'throttle_seconds':
-                    hub.config['throttle_seconds'] = int(args.value)
-                else:
-                    print("Unknown config key: {}".format(args.key))
-                    return 1
-
-                hub.save_config()
-                print("Config updated: {} = {}".format(args.key, args.value))
-
-            elif args.config_cmd == 'init':
-                hub.config = hub._get_default_config()
-                hub.save_config()
-                print("Default config created at: {}".format(hub.config_path))
-
-            else:
-                p_config.print_help()
-
-        else:
-            parser.print_help()
-            return 1
-
+        return handler(args)
     except Exception as e:
         print("Error: {}".format(e), file=sys.stderr)
         return 1
 
-    return 0
-
 
 if __name__ == '__main__':
     sys.exit(main())
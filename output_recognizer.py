@@ -18,6 +18,7 @@ Usage:
 """
 
 import argparse
+import bisect
 import json
 import re
 import sys
@@ -25,6 +26,82 @@ from compat_dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+MAX_SCAN_CHARS = 16 * 1024    # 进度/状态/交互只扫描末尾窗口
+
+# 辅助正则（模块加载时编译一次）
+_JSON_EXTRACT_RE = re.compile(r'(\{[\s\S]*\}|\[[\s\S]*\])')
+_YAML_RE = re.compile(r'^[\w-]+:\s+', re.MULTILINE)
+_TABLE_SEP_RE = re.compile(r'^[\s|+-]+$')
+_MD_SEP_RE = re.compile(r'^[\s|:-]+$')
+_SPACE_SPLIT_RE = re.compile(r'\s{2,}|\t')
+# 列表项：- item / * item / • item, 1. item / 1) item, [x] item / [ ] item
+# 空白用 [^\S\n] 以免跨行匹配
+_LIST_ITEM_RE = re.compile(
+    r'^[^\S\n]*(?:[-*•]|\d+[.)]|\[.\])[^\S\n]+(.+)$',
+    re.MULTILINE
+)
+_SELECT_OPTION_RE = re.compile(r'^\s*(?:\d+[.)]\s*|\[\d+\]\s*)(.+)$', re.MULTILINE)
+_DEFAULT_VALUE_RE = re.compile(r'\[([^\]]+)\]|\(default[:\s]+([^)]+)\)', re.IGNORECASE)
+_DIGIT_RE = re.compile(r'\d')
+_NEWLINE_RE = re.compile(r'\n')
+
+# 预筛选关键字：不含任何关键字的文本不可能被对应模式命中，直接跳过正则
+_STATUS_HINTS = (
+    'pass', 'success', 'ok', 'done', 'complet', '✓', '✔', '√',
+    'fail', 'error', 'crash', '✗', '✘', '×',
+    'warn', 'deprecated', 'caution', '⚠',
+    'info', 'note', 'notice', 'hint', 'tip', 'ℹ',
+    '通过', '成功', '完成', '失败', '错误', '崩溃',
+    '警告', '注意', '过时', '信息', '提示',
+)
+_INTERACTIVE_PUNCT = '[()?？:：'
+_INTERACTIVE_HINTS = (
+    'choose', 'select', '选择', 'password', '密码',
+    'press any key', '按任意键', 'hit enter', '按回车', 'waiting', '等待',
+)
+
+
+def _build_prescreen(hints):
+    """
+    构建关键字预筛选函数（输入为小写文本）
+
+    有 pyahocorasick 时一次线性扫描匹配所有关键字，否则逐个子串查找。
+    """
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for hint in hints:
+            automaton.add_word(hint, hint)
+        automaton.make_automaton()
+
+        def has_hint(text):
+            return next(automaton.iter(text), None) is not None
+    else:
+        def has_hint(text):
+            return any(hint in text for hint in hints)
+    return has_hint
+
+
+_has_status_hint = _build_prescreen(_STATUS_HINTS)
+_has_interactive_hint = _build_prescreen(_INTERACTIVE_HINTS)
+
 
 class OutputType(Enum):
     """输出类型"""
@@ -66,15 +143,8 @@ class ProgressInfo:
     bar_visual: Optional[str] = None        # 进度条可视化
 
     def to_dict(self) -> Dict:
-        return {
-            "percentage": self.percentage,
-            "current": self.current,
-            "total": self.total,
-            "eta": self.eta,
-            "speed": self.speed,
-            "is_spinning": self.is_spinning,
-            "bar_visual": self.bar_visual,
-        }
+        # 字段均为 JSON 原生类型，实例属性即按声明顺序排列的完整字段
+        return dict(vars(self))
 
 
 @dataclass
@@ -86,7 +156,8 @@ class StatusInfo:
 
     def to_dict(self) -> Dict:
         return {
-            "status_type": self.status_type.value,
+            # _value_ 是成员上的普通属性，比经描述符计算的 .value 快
+            "status_type": self.status_type._value_,
             "count": self.count,
             "messages": self.messages[:5],  # 最多5条
         }
@@ -102,13 +173,30 @@ class InteractiveInfo:
 
     def to_dict(self) -> Dict:
         return {
-            "interactive_type": self.interactive_type.value,
+            "interactive_type": self.interactive_type._value_,
             "prompt": self.prompt,
             "options": self.options,
             "default_value": self.default_value,
         }
 
 
+# 上下文字符串中使用的图标
+_STATUS_ICONS = {
+    StatusType.SUCCESS: "✅",
+    StatusType.FAILURE: "❌",
+    StatusType.WARNING: "⚠️",
+    StatusType.INFO: "ℹ️",
+}
+
+_INTERACTIVE_ICONS = {
+    InteractiveType.CONFIRM: "❓",
+    InteractiveType.SELECT: "📋",
+    InteractiveType.INPUT: "✏️",
+    InteractiveType.PASSWORD: "🔐",
+    InteractiveType.WAIT: "⏳",
+}
+
+
 @dataclass
 class ParseResult:
     """解析结果"""
@@ -121,7 +209,7 @@ class ParseResult:
 
     def to_dict(self) -> Dict:
         return {
-            "output_type": self.output_type.value,
+            "output_type": self.output_type._value_,
             "structured_data": self.structured_data,
             "progress": self.progress.to_dict() if self.progress else None,
             "status": self.status.to_dict() if self.status else None,
@@ -130,6 +218,9 @@ class ParseResult:
 
     def to_context_string(self) -> str:
         """生成用于 LLM 上下文的字符串"""
+        if self.progress is None and self.status is None and self.interactive is None:
+            return ""
+
         parts = []
 
         if self.progress and (self.progress.percentage or self.progress.current):
@@ -141,52 +232,68 @@ class ParseResult:
                 parts.append(f"ETA: {self.progress.eta}")
 
         if self.status and self.status.status_type != StatusType.UNKNOWN:
-            status_icons = {
-                StatusType.SUCCESS: "✅",
-                StatusType.FAILURE: "❌",
-                StatusType.WARNING: "⚠️",
-                StatusType.INFO: "ℹ️",
-            }
-            icon = status_icons.get(self.status.status_type, "")
-            parts.append(f"{icon} {self.status.status_type.value}×{self.status.count}")
+            icon = _STATUS_ICONS.get(self.status.status_type, "")
+            parts.append(f"{icon} {self.status.status_type._value_}×{self.status.count}")
 
         if self.interactive and self.interactive.interactive_type != InteractiveType.NONE:
-            interactive_icons = {
-                InteractiveType.CONFIRM: "❓",
-                InteractiveType.SELECT: "📋",
-                InteractiveType.INPUT: "✏️",
-                InteractiveType.PASSWORD: "🔐",
-                InteractiveType.WAIT: "⏳",
-            }
-            icon = interactive_icons.get(self.interactive.interactive_type, "")
-            parts.append(f"{icon} 等待{self.interactive.interactive_type.value}")
+            icon = _INTERACTIVE_ICONS.get(self.interactive.interactive_type, "")
+            parts.append(f"{icon} 等待{self.interactive.interactive_type._value_}")
 
         if parts:
             return "[output] " + " | ".join(parts)
         return ""
 
 
+def _json_loads(text: str) -> Any:
+    """解析 JSON；优先 orjson，其不接受的输入（NaN、超出 64 位的整数等）回退到标准库"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def _json_dumps(obj: Any) -> str:
+    """以 2 空格缩进输出 JSON，非 ASCII 字符原样保留"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
 class OutputRecognizer:
     """输出模式识别器"""
 
-    # 进度条模式
-    PROGRESS_PATTERNS = [
+    # 进度模式：百分比/分数/进度条单次扫描，按命名分组区分类型
+    # 三者的匹配区间互不重叠（百分比数字后只能是 %，进度条不含数字），
+    # 合并后每种类型的命中与逐个扫描一致
+    PROGRESS_PATTERN = re.compile(
         # 百分比: 50%, 50.5%
-        (r'(\d+(?:\.\d+)?)\s*%', 'percentage'),
+        r'(?P<pct>\d+(?:\.\d+)?)\s*%'
         # 分数: 5/10, 50 of 100
-        (r'(\d+)\s*[/of]\s*(\d+)', 'fraction'),
+        r'|(?P<frac_n>\d+)\s*[/of]\s*(?P<frac_d>\d+)'
         # 进度条: [=====>    ], [####....], [▓▓▓▓░░░░]
-        (r'\[([=\->#▓▒░\s]+)\]', 'bar'),
-        # ETA: ETA: 2m, eta 10s, 剩余 5分钟
-        (r'(?:ETA|eta|剩余|remaining)[:\s]*(\d+[smh分秒时]?\d*[smh分秒时]?)', 'eta'),
-        # 速度: 10MB/s, 100 items/s
-        (r'(\d+(?:\.\d+)?\s*(?:MB|KB|GB|items?|行|条)[/每]s?)', 'speed'),
-    ]
+        r'|\[(?P<bar>[=\->#▓▒░\s]+)\]',
+        re.IGNORECASE
+    )
+    # ETA 与速度会吞掉百分比/分数的数字（"剩余 30%"、"10/100MB/s"），单独扫描
+    # ETA: ETA: 2m, eta 10s, 剩余 5分钟
+    ETA_PATTERN = re.compile(
+        r'(?:ETA|eta|剩余|remaining)[:\s]*(\d+[smh分秒时]?\d*[smh分秒时]?)', re.IGNORECASE
+    )
+    # 速度: 10MB/s, 100 items/s
+    SPEED_PATTERN = re.compile(
+        r'(\d+(?:\.\d+)?\s*(?:MB|KB|GB|items?|行|条)[/每]s?)', re.IGNORECASE
+    )
 
     # Spinner 模式
     SPINNER_CHARS = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏',
                      '◐', '◓', '◑', '◒', '|', '/', '-', '\\',
                      '⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷']
+    _SPINNER_RE = re.compile('[' + re.escape(''.join(SPINNER_CHARS)) + ']')
 
     # 状态指示器模式
     STATUS_PATTERNS = {
@@ -212,6 +319,20 @@ class OutputRecognizer:
         ],
     }
 
+    # 主要状态优先级：failure > warning > success > info
+    STATUS_PRIORITY = [StatusType.FAILURE, StatusType.WARNING, StatusType.SUCCESS, StatusType.INFO]
+
+    _COMPILED_STATUS = {
+        st: [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in pats]
+        for st, pats in STATUS_PATTERNS.items()
+    }
+    # 所有状态模式合并成一个正则，只用于快速排除无状态文本；
+    # 计数与消息仍按模式逐个扫描（同一位置可被多个模式/类型各计一次）
+    _STATUS_ANY = re.compile(
+        '|'.join(p for pats in STATUS_PATTERNS.values() for p in pats),
+        re.IGNORECASE | re.MULTILINE
+    )
+
     # 交互提示模式
     INTERACTIVE_PATTERNS = {
         InteractiveType.CONFIRM: [
@@ -240,62 +361,86 @@ class OutputRecognizer:
         ],
     }
 
-    def __init__(self):
-        pass
+    # 预编译的模式表
+    _COMPILED_INTERACTIVE = {
+        it: [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in pats]
+        for it, pats in INTERACTIVE_PATTERNS.items()
+    }
+
+    def __init__(self, max_scan: Optional[int] = MAX_SCAN_CHARS):
+        """
+        Args:
+            max_scan: 进度、状态、交互识别只扫描末尾这么多字符（None/0 表示全文）
+        """
+        self.max_scan = max_scan
+
+    def _scan_window(self, text: str) -> str:
+        """取末尾扫描窗口，从窗口内第一个完整行开始"""
+        if not self.max_scan or len(text) <= self.max_scan:
+            return text
+        tail = text[-self.max_scan:]
+        newline = tail.find('\n')
+        return tail[newline + 1:] if newline != -1 else tail
 
     def parse(self, text: str) -> ParseResult:
         """完整解析输出"""
-        if not text or not text.strip():
+        stripped = text.strip() if text else ""
+        if not stripped:
             return ParseResult(raw_text=text)
 
         result = ParseResult(raw_text=text)
 
+        # 只切分一次行，供各子解析器共享
+        lines = stripped.split('\n')
+
         # 尝试解析结构化数据
-        result.output_type, result.structured_data = self._parse_structured(text)
+        result.output_type, result.structured_data = self._parse_structured(stripped, lines)
+
+        # 其余识别只关心最近的输出
+        window = self._scan_window(text)
+        window_lines = lines if window is text else window.strip().split('\n')
 
         # 解析进度信息
-        result.progress = self._parse_progress(text)
+        result.progress = self._parse_progress(window)
 
         # 解析状态信息
-        result.status = self._parse_status(text)
+        result.status = self._parse_status(window)
 
         # 解析交互信息
-        result.interactive = self._parse_interactive(text)
+        result.interactive = self._parse_interactive(window, window_lines)
 
         return result
 
-    def _parse_structured(self, text: str) -> Tuple[OutputType, Optional[Any]]:
-        """解析结构化输出"""
-        text = text.strip()
-
+    def _parse_structured(self, text: str, lines: List[str]) -> Tuple[OutputType, Optional[Any]]:
+        """解析结构化输出（text 已去除首尾空白）"""
         # 尝试解析 JSON
-        if text.startswith('{') or text.startswith('['):
+        if text.startswith(('{', '[')):
             try:
-                data = json.loads(text)
+                data = _json_loads(text)
                 return OutputType.JSON, data
             except json.JSONDecodeError:
                 # 尝试提取 JSON 部分
-                json_match = re.search(r'(\{[\s\S]*\}|\[[\s\S]*\])', text)
+                json_match = _JSON_EXTRACT_RE.search(text)
                 if json_match:
                     try:
-                        data = json.loads(json_match.group(1))
+                        data = _json_loads(json_match.group(1))
                         return OutputType.JSON, data
                     except json.JSONDecodeError:
                         pass
 
         # 尝试解析 YAML (简单检测)
-        if re.search(r'^[\w-]+:\s+', text, re.MULTILINE):
+        if YAML_AVAILABLE and _YAML_RE.search(text):
             try:
-                import yaml
                 data = yaml.safe_load(text)
                 if isinstance(data, dict):
                     return OutputType.YAML, data
-            except (ImportError, Exception):
+            except Exception:
+                # 除 YAMLError 外，构造器对非法值（如 2023-13-45）会抛 ValueError 等
                 pass
 
         # 检测表格输出
-        if self._is_table(text):
-            table_data = self._parse_table(text)
+        if self._is_table(lines):
+            table_data = self._parse_table(text, lines)
             if table_data:
                 return OutputType.TABLE, table_data
 
@@ -306,24 +451,32 @@ class OutputRecognizer:
 
         return OutputType.PLAIN, None
 
-    def _is_table(self, text: str) -> bool:
+    def _is_table(self, lines: List[str]) -> bool:
         """检测是否为表格输出"""
-        lines = text.strip().split('\n')
         if len(lines) < 2:
             return False
 
         # 检测分隔符行: ---|---|---
         for line in lines[:5]:
-            if re.match(r'^[\s|+-]+$', line) and ('|' in line or '-' in line):
+            if _TABLE_SEP_RE.match(line) and ('|' in line or '-' in line):
                 return True
 
-        # 检测制表符或多空格对齐
-        tab_count = sum(1 for line in lines if '\t' in line or '  ' in line)
-        return tab_count >= len(lines) * 0.5
-
-    def _parse_table(self, text: str) -> Optional[List[Dict]]:
+        # 检测制表符或多空格对齐：至少半数行对齐，结论确定后即停止扫描
+        needed = len(lines) * 0.5
+        remaining = len(lines)
+        tab_count = 0
+        for line in lines:
+            remaining -= 1
+            if '\t' in line or '  ' in line:
+                tab_count += 1
+                if tab_count >= needed:
+                    return True
+            elif tab_count + remaining < needed:
+                return False
+        return False
+
+    def _parse_table(self, text: str, lines: List[str]) -> Optional[List[Dict]]:
         """解析表格输出"""
-        lines = text.strip().split('\n')
         if len(lines) < 2:
             return None
 
@@ -341,12 +494,12 @@ class OutputRecognizer:
         data_start = 0
 
         for i, line in enumerate(lines):
-            if '|' in line and not re.match(r'^[\s|:-]+$', line):
+            if '|' in line and not _MD_SEP_RE.match(line):
                 if header_line is None:
                     header_line = line
                     data_start = i + 1
                     # 跳过分隔符行
-                    if data_start < len(lines) and re.match(r'^[\s|:-]+$', lines[data_start]):
+                    if data_start < len(lines) and _MD_SEP_RE.match(lines[data_start]):
                         data_start += 1
                     break
 
@@ -359,7 +512,7 @@ class OutputRecognizer:
         # 解析数据行
         result = []
         for line in lines[data_start:]:
-            if '|' in line and not re.match(r'^[\s|:-]+$', line):
+            if '|' in line and not _MD_SEP_RE.match(line):
                 cells = [c.strip() for c in line.split('|') if c.strip()]
                 if len(cells) == len(headers):
                     result.append(dict(zip(headers, cells)))
@@ -373,37 +526,21 @@ class OutputRecognizer:
             return None
 
         # 使用多空格或制表符分隔
-        header_parts = re.split(r'\s{2,}|\t', lines[0].strip())
+        header_parts = _SPACE_SPLIT_RE.split(lines[0].strip())
         if len(header_parts) < 2:
             return None
 
         result = []
         for line in lines[1:]:
-            parts = re.split(r'\s{2,}|\t', line.strip())
+            parts = _SPACE_SPLIT_RE.split(line.strip())
             if len(parts) == len(header_parts):
                 result.append(dict(zip(header_parts, parts)))
 
         return result if result else None
 
     def _parse_list(self, text: str) -> Optional[List[str]]:
-        """解析列表输出"""
-        lines = text.strip().split('\n')
-        list_items = []
-
-        # 匹配列表项模式
-        list_patterns = [
-            r'^\s*[-*•]\s+(.+)$',           # - item, * item, • item
-            r'^\s*\d+[.)]\s+(.+)$',          # 1. item, 1) item
-            r'^\s*\[.\]\s+(.+)$',            # [x] item, [ ] item
-        ]
-
-        for line in lines:
-            for pattern in list_patterns:
-                match = re.match(pattern, line)
-                if match:
-                    list_items.append(match.group(1))
-                    break
-
+        """解析列表输出（text 已去除首尾空白）"""
+        list_items = _LIST_ITEM_RE.findall(text)
         return list_items if len(list_items) >= 2 else None
 
     def _parse_progress(self, text: str) -> Optional[ProgressInfo]:
@@ -412,65 +549,83 @@ class OutputRecognizer:
         has_progress = False
 
         # 检测 Spinner
-        for char in self.SPINNER_CHARS:
-            if char in text:
-                progress.is_spinning = True
-                has_progress = True
-                break
-
-        for pattern, ptype in self.PROGRESS_PATTERNS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                has_progress = True
-
-                if ptype == 'percentage':
-                    # 取最后一个百分比
-                    progress.percentage = float(matches[-1])
-
-                elif ptype == 'fraction':
-                    # 取最后一个分数
-                    current, total = matches[-1]
-                    progress.current = int(current)
-                    progress.total = int(total)
-                    if progress.total > 0:
-                        progress.percentage = (progress.current / progress.total) * 100
-
-                elif ptype == 'bar':
-                    progress.bar_visual = matches[-1]
-                    # 从进度条估算百分比
-                    bar = matches[-1]
-                    filled = len(re.findall(r'[=#▓]', bar))
-                    total = len(bar.replace(' ', ''))
-                    if total > 0:
-                        progress.percentage = progress.percentage or (filled / total) * 100
-
-                elif ptype == 'eta':
-                    progress.eta = matches[-1]
-
-                elif ptype == 'speed':
-                    progress.speed = matches[-1]
+        if self._SPINNER_RE.search(text):
+            progress.is_spinning = True
+            has_progress = True
+
+        # 单次扫描，记录每种类型的最后一次匹配
+        # 除进度条（需要 '['）外的模式都需要数字
+        last = {}
+        if '[' not in text and not _DIGIT_RE.search(text):
+            return progress if has_progress else None
+
+        for match in self.PROGRESS_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'frac_d':
+                kind = 'fraction'
+            last[kind] = match
+
+        if last:
+            has_progress = True
+
+        if 'pct' in last:
+            # 取最后一个百分比
+            progress.percentage = float(last['pct'].group('pct'))
+
+        if 'fraction' in last:
+            # 取最后一个分数
+            progress.current = int(last['fraction'].group('frac_n'))
+            progress.total = int(last['fraction'].group('frac_d'))
+            if progress.total > 0:
+                progress.percentage = (progress.current / progress.total) * 100
+
+        if 'bar' in last:
+            bar = last['bar'].group('bar')
+            progress.bar_visual = bar
+            # 从进度条估算百分比
+            filled = bar.count('=') + bar.count('#') + bar.count('▓')
+            total = len(bar) - bar.count(' ')
+            if total > 0:
+                progress.percentage = progress.percentage or (filled / total) * 100
+
+        etas = self.ETA_PATTERN.findall(text)
+        if etas:
+            has_progress = True
+            progress.eta = etas[-1]
+
+        speeds = self.SPEED_PATTERN.findall(text)
+        if speeds:
+            has_progress = True
+            progress.speed = speeds[-1]
 
         return progress if has_progress else None
 
     def _parse_status(self, text: str) -> Optional[StatusInfo]:
         """解析状态信息"""
+        lowered = text.lower()
+        if not _has_status_hint(lowered):
+            return None
+
+        if not self._STATUS_ANY.search(text):
+            return None
+
         status_counts = {}
         status_messages = {}
+        line_starts = None
 
-        for status_type, patterns in self.STATUS_PATTERNS.items():
+        for status_type, patterns in self._COMPILED_STATUS.items():
             count = 0
             messages = []
 
             for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
+                for match in pattern.finditer(text):
                     count += 1
-                    # 获取匹配行作为消息
-                    start = text.rfind('\n', 0, match.start()) + 1
-                    end = text.find('\n', match.end())
-                    if end == -1:
-                        end = len(text)
-                    line = text[start:end].strip()
+                    # 获取匹配行作为消息（行首偏移只计算一次，之后二分查找）
+                    if line_starts is None:
+                        line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(text)]
+                        line_starts.append(len(text) + 1)
+                    i = bisect.bisect_right(line_starts, match.start())
+                    line = text[line_starts[i - 1]:line_starts[i] - 1].strip()
                     if line and line not in messages:
                         messages.append(line[:100])
 
@@ -481,9 +636,8 @@ class OutputRecognizer:
         if not status_counts:
             return None
 
-        # 确定主要状态（按优先级：failure > warning > success > info）
-        priority = [StatusType.FAILURE, StatusType.WARNING, StatusType.SUCCESS, StatusType.INFO]
-        for st in priority:
+        # 确定主要状态
+        for st in self.STATUS_PRIORITY:
             if st in status_counts:
                 return StatusInfo(
                     status_type=st,
@@ -493,15 +647,19 @@ class OutputRecognizer:
 
         return None
 
-    def _parse_interactive(self, text: str) -> Optional[InteractiveInfo]:
-        """解析交互信息"""
+    def _parse_interactive(self, text: str, lines: List[str]) -> Optional[InteractiveInfo]:
+        """解析交互信息（lines 为 text.strip() 按行切分的结果）"""
         # 只检查最后几行（交互提示通常在末尾）
-        lines = text.strip().split('\n')
         check_text = '\n'.join(lines[-5:]) if len(lines) > 5 else text
 
-        for interactive_type, patterns in self.INTERACTIVE_PATTERNS.items():
+        if not any(c in check_text for c in _INTERACTIVE_PUNCT):
+            lowered = check_text.lower()
+            if not _has_interactive_hint(lowered):
+                return None
+
+        for interactive_type, patterns in self._COMPILED_INTERACTIVE.items():
             for pattern in patterns:
-                match = re.search(pattern, check_text, re.IGNORECASE | re.MULTILINE)
+                match = pattern.search(check_text)
                 if match:
                     info = InteractiveInfo(interactive_type=interactive_type)
 
@@ -511,13 +669,11 @@ class OutputRecognizer:
 
                     # 提取选项（针对选择类型）
                     if interactive_type == InteractiveType.SELECT:
-                        options = re.findall(r'^\s*(?:\d+[.)]\s*|\[\d+\]\s*)(.+)$',
-                                           check_text, re.MULTILINE)
+                        options = _SELECT_OPTION_RE.findall(check_text)
                         info.options = options[:10]
 
                     # 提取默认值
-                    default_match = re.search(r'\[([^\]]+)\]|\(default[:\s]+([^)]+)\)',
-                                            info.prompt, re.IGNORECASE)
+                    default_match = _DEFAULT_VALUE_RE.search(info.prompt)
                     if default_match:
                         info.default_value = default_match.group(1) or default_match.group(2)
 
@@ -531,17 +687,19 @@ class OutputRecognizer:
         return result.to_context_string()
 
     def is_waiting_input(self, text: str) -> bool:
-        """判断是否在等待用户输入"""
-        result = self.parse(text)
-        return (result.interactive is not None and
-                result.interactive.interactive_type != InteractiveType.NONE)
+        """判断是否在等待用户输入（只做交互识别）"""
+        if not text or not text.strip():
+            return False
+        window = self._scan_window(text)
+        info = self._parse_interactive(window, window.strip().split('\n'))
+        return info is not None and info.interactive_type != InteractiveType.NONE
 
     def get_progress_percentage(self, text: str) -> Optional[float]:
-        """获取进度百分比"""
-        result = self.parse(text)
-        if result.progress:
-            return result.progress.percentage
-        return None
+        """获取进度百分比（只做进度识别）"""
+        if not text or not text.strip():
+            return None
+        progress = self._parse_progress(self._scan_window(text))
+        return progress.percentage if progress else None
 
 
 # ==================== CLI 入口 ====================
@@ -586,26 +744,26 @@ def main(argv=None):
 
         if args.command == 'parse':
             result = recognizer.parse(text or "")
-            print(json.dumps(result.to_dict(), indent=2, ensure_ascii=False))
+            print(_json_dumps(result.to_dict()))
 
         elif args.command == 'status':
             result = recognizer.parse(text or "")
             if result.status:
-                print(json.dumps(result.status.to_dict(), indent=2, ensure_ascii=False))
+                print(_json_dumps(result.status.to_dict()))
             else:
                 print("{}")
 
         elif args.command == 'progress':
             result = recognizer.parse(text or "")
             if result.progress:
-                print(json.dumps(result.progress.to_dict(), indent=2, ensure_ascii=False))
+                print(_json_dumps(result.progress.to_dict()))
             else:
                 print("{}")
 
         elif args.command == 'interactive':
             result = recognizer.parse(text or "")
             if result.interactive:
-                print(json.dumps(result.interactive.to_dict(), indent=2, ensure_ascii=False))
+                print(_json_dumps(result.interactive.to_dict()))
             else:
                 print("{}")
 
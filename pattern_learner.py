@@ -11,34 +11,75 @@ Claude Monitor Pattern Learner
 4. 模式应用（匹配/排序/反馈）
 
 Usage:
-    python3 pattern_learner.py extract <session_id>
+    python3 pattern_learner.py extract <session_id> [<session_id> ...]
     python3 pattern_learner.py match <input_text> [--limit 5]
     python3 pattern_learner.py apply <pattern_id> [--record-outcome success|failure]
     python3 pattern_learner.py stats [--type success|failure|all]
     python3 pattern_learner.py prune [--min-confidence 0.3] [--max-age-days 90]
 """
 
-import argparse
 import hashlib
+import heapq
 import json
 import os
 import re
+import secrets
 import sqlite3
 import sys
 import time
-import uuid
-from collections import defaultdict
+from collections import Counter
 from contextlib import contextmanager
+from functools import lru_cache
 from compat_dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Database path
 DEFAULT_DB_DIR = Path.home() / ".tmux-monitor" / "memory"
 DEFAULT_DB_PATH = DEFAULT_DB_DIR / "monitor.db"
 DB_PATH = Path(os.environ.get("AI_MONITOR_MEMORY_DB", str(DEFAULT_DB_PATH)))
 
+# Keep MD5 signatures so new patterns merge with rows learned by older versions
+LEGACY_MD5_SIGNATURES = os.environ.get("AI_MONITOR_PATTERN_MD5_SIGNATURES", "0") == "1"
+
+# Keyword extraction
+MAX_KEYWORDS = 20
+_STOP_WORDS = frozenset({
+    "the", "a", "an", "is", "are", "was", "were", "be", "been",
+    "being", "have", "has", "had", "do", "does", "did", "will",
+    "would", "could", "should", "may", "might", "must", "shall",
+    "can", "need", "dare", "ought", "used", "to", "of", "in",
+    "for", "on", "with", "at", "by", "from", "as", "into",
+    "through", "during", "before", "after", "above", "below",
+    "between", "under", "again", "further", "then", "once",
+    "here", "there", "when", "where", "why", "how", "all",
+    "each", "few", "more", "most", "other", "some", "such",
+    "no", "nor", "not", "only", "own", "same", "so", "than",
+    "too", "very", "just", "and", "but", "if", "or", "because",
+    "until", "while", "this", "that", "these", "those", "it",
+})
+# Words of 3+ chars, with stop words rejected inside the regex itself
+_KEYWORD_RE = re.compile(
+    r'\b(?!(?:' + '|'.join(sorted(w for w in _STOP_WORDS if len(w) >= 3)) + r')\b)'
+    r'[a-z][a-z0-9_]{2,}\b'
+)
+
+
+def _fingerprint(content: str) -> str:
+    """12-hex-char non-cryptographic fingerprint of content"""
+    data = content.encode()
+    if LEGACY_MD5_SIGNATURES:
+        return hashlib.md5(data).hexdigest()[:12]
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
 
 class PatternType(Enum):
     """Pattern type classification"""
@@ -173,15 +214,33 @@ class PatternLearner:
         ],
     }
 
+    # One compiled alternation per category, checked in declaration order
+    _CATEGORY_REGEXES = [
+        (category, re.compile("|".join(patterns)))
+        for category, patterns in TRIGGER_PATTERNS.items()
+    ]
+
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or DB_PATH
-        self._ensure_db()
+        self._conn: Optional[sqlite3.Connection] = None
+        # The database is opened, and its schema checked, on first use
+        self._schema_ready = False
 
     def _ensure_db(self):
         """Ensure database exists with proper schema"""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._get_conn() as conn:
+            # Read before the write lock is held, so another process may be
+            # migrating the same database; the backfills below are idempotent
+            # and the fold re-checks under the lock
+            existing = self._schema_objects(conn)
+
+            # executescript() commits first; the script's own BEGIN IMMEDIATE
+            # takes the write lock and keeps the schema and the data migrations
+            # below in one transaction, so an interrupted first open leaves
+            # nothing half-migrated
             conn.executescript("""
+                BEGIN IMMEDIATE;
+
                 CREATE TABLE IF NOT EXISTS learned_patterns (
                     pattern_id TEXT PRIMARY KEY,
                     pattern_type TEXT NOT NULL,
@@ -200,28 +259,224 @@ class PatternLearner:
                     created_at INTEGER NOT NULL
                 );
 
-                CREATE INDEX IF NOT EXISTS idx_patterns_type
-                    ON learned_patterns(pattern_type);
+                -- get_stats(): covers the per-type count/confidence aggregate
+                DROP INDEX IF EXISTS idx_patterns_type;
+                CREATE INDEX IF NOT EXISTS idx_patterns_type_confidence
+                    ON learned_patterns(pattern_type, confidence);
                 CREATE INDEX IF NOT EXISTS idx_patterns_category
                     ON learned_patterns(trigger_category);
-                CREATE INDEX IF NOT EXISTS idx_patterns_confidence
-                    ON learned_patterns(confidence DESC);
-                CREATE INDEX IF NOT EXISTS idx_patterns_signature
-                    ON learned_patterns(trigger_signature);
+                -- match(): the partial index matches its pattern_type filter and
+                -- yields rows already in ORDER BY order, so no sort step is needed
+                DROP INDEX IF EXISTS idx_patterns_confidence;
+                CREATE INDEX IF NOT EXISTS idx_patterns_match
+                    ON learned_patterns(confidence DESC, success_count DESC)
+                    WHERE pattern_type IN ('success', 'neutral');
+                -- prune(): one partial index per DELETE condition
+                CREATE INDEX IF NOT EXISTS idx_prune_weak
+                    ON learned_patterns(confidence)
+                    WHERE (success_count + failure_count) < 5;
+                CREATE INDEX IF NOT EXISTS idx_prune_stale
+                    ON learned_patterns(last_used_at)
+                    WHERE last_used_at > 0;
+
+                -- Inverted index: keyword -> patterns containing it
+                CREATE TABLE IF NOT EXISTS pattern_keywords (
+                    keyword TEXT NOT NULL,
+                    pattern_id TEXT NOT NULL,
+                    PRIMARY KEY (keyword, pattern_id)
+                ) WITHOUT ROWID;
+
+                CREATE INDEX IF NOT EXISTS idx_pattern_keywords_pattern
+                    ON pattern_keywords(pattern_id);
+
+                CREATE TRIGGER IF NOT EXISTS trg_patterns_delete_keywords
+                AFTER DELETE ON learned_patterns
+                BEGIN
+                    DELETE FROM pattern_keywords WHERE pattern_id = OLD.pattern_id;
+                END;
+
+                -- Sessions each pattern was learned from (replaces the JSON column)
+                CREATE TABLE IF NOT EXISTS pattern_sessions (
+                    pattern_id TEXT NOT NULL,
+                    session_id TEXT NOT NULL,
+                    PRIMARY KEY (pattern_id, session_id)
+                ) WITHOUT ROWID;
+
+                CREATE TRIGGER IF NOT EXISTS trg_patterns_delete_sessions
+                AFTER DELETE ON learned_patterns
+                BEGIN
+                    DELETE FROM pattern_sessions WHERE pattern_id = OLD.pattern_id;
+                END;
             """)
 
-    @contextmanager
-    def _get_conn(self):
-        """Get database connection"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10)
+            if "pattern_keywords" not in existing:
+                # Backfill postings for patterns learned before the index existed
+                rows = conn.execute("""
+                    SELECT pattern_id, trigger_keywords FROM learned_patterns
+                """).fetchall()
+                for row in rows:
+                    self._index_keywords(
+                        conn, row["pattern_id"], json.loads(row["trigger_keywords"] or "[]")
+                    )
+
+            if "pattern_sessions" not in existing:
+                # Move session lists out of the legacy JSON column
+                rows = conn.execute("""
+                    SELECT pattern_id, source_sessions FROM learned_patterns
+                    WHERE source_sessions IS NOT NULL
+                """).fetchall()
+                conn.executemany("""
+                    INSERT OR IGNORE INTO pattern_sessions (pattern_id, session_id)
+                    VALUES (?, ?)
+                """, [
+                    (row["pattern_id"], session_id)
+                    for row in rows
+                    for session_id in json.loads(row["source_sessions"] or "[]")
+                ])
+
+            if ("idx_patterns_signature_unique" not in existing
+                    and "idx_patterns_signature_unique" not in self._schema_objects(conn)):
+                # Signatures are upsert keys; fold duplicates left by older
+                # versions once their sessions are in pattern_sessions
+                self._fold_duplicate_signatures(conn)
+                conn.execute("DROP INDEX IF EXISTS idx_patterns_signature")
+                conn.execute("""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_patterns_signature_unique
+                        ON learned_patterns(trigger_signature)
+                """)
+
+    @staticmethod
+    def _schema_objects(conn: sqlite3.Connection) -> Set[str]:
+        """Names of the schema objects whose absence triggers a migration"""
+        return {
+            row["name"] for row in conn.execute("""
+                SELECT name FROM sqlite_master
+                WHERE name IN (
+                    'pattern_keywords', 'pattern_sessions', 'idx_patterns_signature_unique'
+                )
+            """)
+        }
+
+    def _fold_duplicate_signatures(self, conn: sqlite3.Connection):
+        """Merge rows sharing a trigger_signature into the oldest one"""
+        signatures = conn.execute("""
+            SELECT trigger_signature FROM learned_patterns
+            GROUP BY trigger_signature HAVING COUNT(*) > 1
+        """).fetchall()
+        for (signature,) in signatures:
+            rows = conn.execute("""
+                SELECT pattern_id, success_count, failure_count, last_used_at
+                FROM learned_patterns
+                WHERE trigger_signature = ?
+                ORDER BY rowid
+            """, (signature,)).fetchall()
+            keep_id = rows[0]["pattern_id"]
+            dup_ids = [(row["pattern_id"],) for row in rows[1:]]
+
+            merged = Pattern(
+                success_count=sum(row["success_count"] or 0 for row in rows),
+                failure_count=sum(row["failure_count"] or 0 for row in rows),
+            )
+            conn.execute("""
+                UPDATE learned_patterns SET
+                    success_count = ?, failure_count = ?, confidence = ?, last_used_at = ?
+                WHERE pattern_id = ?
+            """, (
+                merged.success_count,
+                merged.failure_count,
+                self._compute_confidence(merged),
+                max(row["last_used_at"] or 0 for row in rows),
+                keep_id,
+            ))
+            conn.executemany("""
+                INSERT OR IGNORE INTO pattern_sessions (pattern_id, session_id)
+                SELECT ?, session_id FROM pattern_sessions WHERE pattern_id = ?
+            """, [(keep_id, dup_id) for (dup_id,) in dup_ids])
+            # The delete triggers drop the duplicates' keyword and session rows
+            conn.executemany("DELETE FROM learned_patterns WHERE pattern_id = ?", dup_ids)
+
+    @staticmethod
+    def _index_keywords(conn: sqlite3.Connection, pattern_id: str, keywords: List[str]):
+        """Add keyword postings for a pattern"""
+        conn.executemany("""
+            INSERT OR IGNORE INTO pattern_keywords (keyword, pattern_id)
+            VALUES (?, ?)
+        """, [(keyword, pattern_id) for keyword in set(keywords)])
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the shared connection; transactions are managed by _get_conn"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # match() issues one statement shape per keyword count and candidate
+        # count; a larger statement cache keeps the write statements prepared
+        conn = sqlite3.connect(
+            str(self.db_path), timeout=10, isolation_level=None, cached_statements=512
+        )
         conn.row_factory = sqlite3.Row
-        try:
+        # WAL is persistent in the database file; readers stop blocking the writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Per-connection tuning: with WAL, NORMAL only syncs at checkpoints
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+
+    @contextmanager
+    def _get_conn(self, immediate: bool = False):
+        """Get the shared database connection inside a transaction
+
+        Nested calls join the enclosing transaction. ``immediate`` takes the
+        write lock up front for read-then-write work.
+        """
+        if self._conn is None:
+            self._conn = self._connect()
+        if not self._schema_ready:
+            self._schema_ready = True     # _ensure_db() re-enters _get_conn
+            try:
+                self._ensure_db()
+            except BaseException:
+                self._schema_ready = False
+                raise
+        conn = self._conn
+
+        if conn.in_transaction:
             yield conn
-            conn.commit()
-        finally:
-            conn.close()
+            return
 
-    def _row_to_pattern(self, row: sqlite3.Row) -> Pattern:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        # executescript() may already have committed
+        if conn.in_transaction:
+            conn.execute("COMMIT")
+
+    def close(self):
+        """Close the shared database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _load_sessions(
+        conn: sqlite3.Connection,
+        pattern_ids: List[str]
+    ) -> Dict[str, List[str]]:
+        """Get source sessions for the given patterns"""
+        sessions: Dict[str, List[str]] = {}
+        if pattern_ids:
+            placeholders = ", ".join("?" * len(pattern_ids))
+            for row in conn.execute(f"""
+                SELECT pattern_id, session_id FROM pattern_sessions
+                WHERE pattern_id IN ({placeholders})
+            """, pattern_ids):
+                sessions.setdefault(row["pattern_id"], []).append(row["session_id"])
+        return sessions
+
+    def _row_to_pattern(self, row: sqlite3.Row, source_sessions: List[str]) -> Pattern:
         """Convert database row to Pattern object"""
         return Pattern(
             pattern_id=row["pattern_id"],
@@ -233,7 +488,7 @@ class PatternLearner:
             action_type=row["action_type"] or "",
             expected_outcome=row["expected_outcome"] or "",
             context_constraints=json.loads(row["context_constraints"] or "{}"),
-            source_sessions=json.loads(row["source_sessions"] or "[]"),
+            source_sessions=source_sessions,
             success_count=row["success_count"] or 0,
             failure_count=row["failure_count"] or 0,
             confidence=row["confidence"] or 0.5,
@@ -247,10 +502,10 @@ class PatternLearner:
         """Extract patterns from a session's decision history"""
         patterns = []
 
-        with self._get_conn() as conn:
+        with self._get_conn(immediate=True) as conn:
             # Get session decisions
             decisions = conn.execute("""
-                SELECT * FROM decisions
+                SELECT outcome, input_preview, output, stage, role FROM decisions
                 WHERE session_id = ?
                 ORDER BY timestamp ASC
             """, (session_id,)).fetchall()
@@ -258,37 +513,40 @@ class PatternLearner:
             if not decisions:
                 return patterns
 
-            # Analyze decision sequences
-            for i, decision in enumerate(decisions):
-                # Get context (previous decisions)
-                context_window = decisions[max(0, i - 3):i]
-                next_decisions = decisions[i + 1:i + 3]
+            # Column-wise views so the sliding windows index flat tuples
+            outcomes, previews, outputs, stages, roles = zip(*decisions)
 
-                # Try to extract pattern from this decision
+            # Analyze decision sequences
+            for i, outcome in enumerate(outcomes):
+                # Try to extract pattern from this decision, with the
+                # previous decisions as context
                 pattern = self._extract_pattern_from_decision(
-                    decision, context_window, next_decisions, session_id
+                    outcome, previews[i], outputs[i], stages[i], roles[i],
+                    outcomes[max(0, i - 3):i], outcomes[i + 1:i + 3], session_id
                 )
                 if pattern:
                     patterns.append(pattern)
 
-        # Merge similar patterns
-        merged = self._merge_similar_patterns(patterns)
+            # Merge similar patterns
+            merged = self._merge_similar_patterns(patterns)
 
-        # Save patterns to database
-        for pattern in merged:
-            self._save_pattern(pattern)
+            # Save patterns to database
+            self._save_patterns(merged, conn)
 
         return merged
 
     def _extract_pattern_from_decision(
         self,
-        decision: sqlite3.Row,
-        context: List[sqlite3.Row],
-        next_decisions: List[sqlite3.Row],
+        outcome: Optional[str],
+        input_preview: Optional[str],
+        output: Optional[str],
+        stage: Optional[str],
+        role: Optional[str],
+        previous_outcomes: Tuple[Optional[str], ...],
+        next_outcomes: Tuple[Optional[str], ...],
         session_id: str
     ) -> Optional[Pattern]:
         """Extract a pattern from a single decision with context"""
-        outcome = decision["outcome"]
         if not outcome:
             return None
 
@@ -297,7 +555,7 @@ class PatternLearner:
             pattern_type = PatternType.SUCCESS
         elif outcome in ["nudge", "command"]:
             # Check if subsequent decisions indicate success
-            if next_decisions and any(d["outcome"] in ["wait", "ok"] for d in next_decisions):
+            if any(o in ("wait", "ok") for o in next_outcomes):
                 pattern_type = PatternType.SUCCESS
             else:
                 pattern_type = PatternType.NEUTRAL
@@ -305,24 +563,24 @@ class PatternLearner:
             pattern_type = PatternType.NEUTRAL
 
         # Build trigger context
-        input_preview = decision["input_preview"] or ""
+        input_preview = input_preview or ""
         trigger_category = self._categorize_trigger(input_preview)
         trigger_keywords = self._extract_keywords(input_preview)
         trigger_signature = self._compute_signature(trigger_keywords)
 
         # Build action template
-        output = decision["output"] or ""
+        output = output or ""
         action_type = outcome
 
         # Build context constraints
         context_constraints = {
-            "stage": decision["stage"],
-            "role": decision["role"],
-            "previous_outcomes": [d["outcome"] for d in context if d["outcome"]],
+            "stage": stage,
+            "role": role,
+            "previous_outcomes": [o for o in previous_outcomes if o],
         }
 
         return Pattern(
-            pattern_id=str(uuid.uuid4())[:8],
+            pattern_id=secrets.token_hex(4),
             pattern_type=pattern_type,
             trigger_signature=trigger_signature,
             trigger_category=trigger_category,
@@ -340,58 +598,17 @@ class PatternLearner:
 
     def _categorize_trigger(self, text: str) -> TriggerCategory:
         """Categorize trigger based on text content"""
-        text_lower = text.lower()
-
-        for category, patterns in self.TRIGGER_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    return category
-
-        return TriggerCategory.UNKNOWN
+        return _categorize_trigger_cached(text.lower())
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract significant keywords from text"""
-        # Normalize text
-        text = text.lower()
-
-        # Remove common words
-        stop_words = {
-            "the", "a", "an", "is", "are", "was", "were", "be", "been",
-            "being", "have", "has", "had", "do", "does", "did", "will",
-            "would", "could", "should", "may", "might", "must", "shall",
-            "can", "need", "dare", "ought", "used", "to", "of", "in",
-            "for", "on", "with", "at", "by", "from", "as", "into",
-            "through", "during", "before", "after", "above", "below",
-            "between", "under", "again", "further", "then", "once",
-            "here", "there", "when", "where", "why", "how", "all",
-            "each", "few", "more", "most", "other", "some", "such",
-            "no", "nor", "not", "only", "own", "same", "so", "than",
-            "too", "very", "just", "and", "but", "if", "or", "because",
-            "until", "while", "this", "that", "these", "those", "it",
-        }
-
-        # Extract words
-        words = re.findall(r'\b[a-z][a-z0-9_]{2,}\b', text)
-
-        # Filter and deduplicate
-        keywords = []
-        seen = set()
-        for word in words:
-            if word not in stop_words and word not in seen:
-                keywords.append(word)
-                seen.add(word)
-
-        return keywords[:20]  # Limit to top 20 keywords
+        return list(_extract_keywords_cached(text.lower()))
 
     def _compute_signature(self, keywords: List[str]) -> str:
         """Compute a stable signature from keywords"""
         if not keywords:
             return "empty"
-
-        # Sort keywords for stability
-        sorted_keywords = sorted(set(keywords))
-        content = "|".join(sorted_keywords)
-        return hashlib.md5(content.encode()).hexdigest()[:12]
+        return _compute_signature_cached(tuple(keywords))
 
     def _merge_similar_patterns(self, patterns: List[Pattern]) -> List[Pattern]:
         """Merge patterns with similar signatures"""
@@ -399,19 +616,27 @@ class PatternLearner:
             return []
 
         merged = {}
+        sessions_by_sig = {}    # only for signatures that actually merged
         for pattern in patterns:
             sig = pattern.trigger_signature
-            if sig in merged:
-                # Merge into existing pattern
-                existing = merged[sig]
-                existing.success_count += pattern.success_count
-                existing.failure_count += pattern.failure_count
-                existing.source_sessions.extend(pattern.source_sessions)
-                existing.source_sessions = list(set(existing.source_sessions))
-                # Update confidence based on accumulated data
-                existing.confidence = self._compute_confidence(existing)
-            else:
+            existing = merged.get(sig)
+            if existing is None:
                 merged[sig] = pattern
+                continue
+
+            # Merge into existing pattern
+            existing.success_count += pattern.success_count
+            existing.failure_count += pattern.failure_count
+            sessions = sessions_by_sig.get(sig)
+            if sessions is None:
+                sessions = sessions_by_sig[sig] = set(existing.source_sessions)
+            sessions.update(pattern.source_sessions)
+
+        for sig, sessions in sessions_by_sig.items():
+            existing = merged[sig]
+            existing.source_sessions = list(sessions)
+            # Update confidence based on accumulated data
+            existing.confidence = self._compute_confidence(existing)
 
         return list(merged.values())
 
@@ -434,60 +659,79 @@ class PatternLearner:
 
         return round(confidence, 3)
 
+    _UPSERT_SQL = """
+        INSERT INTO learned_patterns (
+            pattern_id, pattern_type, trigger_signature,
+            trigger_category, trigger_keywords, action_template,
+            action_type, expected_outcome, context_constraints,
+            success_count, failure_count,
+            confidence, last_used_at, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(trigger_signature) DO UPDATE SET
+            success_count = success_count + excluded.success_count,
+            failure_count = failure_count + excluded.failure_count,
+            confidence = excluded.confidence,
+            last_used_at = excluded.last_used_at
+    """
+
     def _save_pattern(self, pattern: Pattern):
         """Save or update pattern in database"""
-        with self._get_conn() as conn:
-            # Check if similar pattern exists
-            existing = conn.execute("""
-                SELECT pattern_id FROM learned_patterns
-                WHERE trigger_signature = ?
-            """, (pattern.trigger_signature,)).fetchone()
+        self._save_patterns([pattern])
 
-            if existing:
-                # Update existing pattern
-                conn.execute("""
-                    UPDATE learned_patterns SET
-                        success_count = success_count + ?,
-                        failure_count = failure_count + ?,
-                        source_sessions = ?,
-                        confidence = ?,
-                        last_used_at = ?
-                    WHERE pattern_id = ?
-                """, (
-                    pattern.success_count,
-                    pattern.failure_count,
-                    json.dumps(pattern.source_sessions),
-                    pattern.confidence,
-                    int(time.time()),
-                    existing["pattern_id"],
-                ))
-            else:
-                # Insert new pattern
-                conn.execute("""
-                    INSERT INTO learned_patterns (
-                        pattern_id, pattern_type, trigger_signature,
-                        trigger_category, trigger_keywords, action_template,
-                        action_type, expected_outcome, context_constraints,
-                        source_sessions, success_count, failure_count,
-                        confidence, last_used_at, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    pattern.pattern_id,
-                    pattern.pattern_type.value,
-                    pattern.trigger_signature,
-                    pattern.trigger_category.value,
-                    json.dumps(pattern.trigger_keywords),
-                    pattern.action_template,
-                    pattern.action_type,
-                    pattern.expected_outcome,
-                    json.dumps(pattern.context_constraints),
-                    json.dumps(pattern.source_sessions),
-                    pattern.success_count,
-                    pattern.failure_count,
-                    pattern.confidence,
-                    int(time.time()),
-                    pattern.created_at,
-                ))
+    def _save_patterns(
+        self,
+        patterns: List[Pattern],
+        conn: Optional[sqlite3.Connection] = None
+    ):
+        """Save or update patterns (keyed by trigger signature) in one transaction"""
+        if conn is None:
+            with self._get_conn(immediate=True) as conn:
+                self._save_patterns(patterns, conn)
+            return
+
+        if not patterns:
+            return
+
+        now = int(time.time())
+        conn.executemany(self._UPSERT_SQL, [
+            (
+                pattern.pattern_id,
+                pattern.pattern_type.value,
+                pattern.trigger_signature,
+                pattern.trigger_category.value,
+                json.dumps(pattern.trigger_keywords),
+                pattern.action_template,
+                pattern.action_type,
+                pattern.expected_outcome,
+                json.dumps(pattern.context_constraints),
+                pattern.success_count,
+                pattern.failure_count,
+                pattern.confidence,
+                now,
+                pattern.created_at,
+            )
+            for pattern in patterns
+        ])
+
+        # Index keywords under the stored pattern id (the existing row's on update)
+        conn.executemany("""
+            INSERT OR IGNORE INTO pattern_keywords (keyword, pattern_id)
+            SELECT ?, pattern_id FROM learned_patterns WHERE trigger_signature = ?
+        """, [
+            (keyword, pattern.trigger_signature)
+            for pattern in patterns
+            for keyword in set(pattern.trigger_keywords)
+        ])
+
+        # Sessions accumulate across updates
+        conn.executemany("""
+            INSERT OR IGNORE INTO pattern_sessions (pattern_id, session_id)
+            SELECT pattern_id, ? FROM learned_patterns WHERE trigger_signature = ?
+        """, [
+            (session_id, pattern.trigger_signature)
+            for pattern in patterns
+            for session_id in set(pattern.source_sessions)
+        ])
 
     # ==================== Pattern Matching ====================
 
@@ -498,7 +742,6 @@ class PatternLearner:
         limit: int = 5
     ) -> List[PatternMatch]:
         """Find patterns matching the input"""
-        matches = []
         context = context or {}
 
         # Extract features from input
@@ -506,27 +749,138 @@ class PatternLearner:
         input_category = self._categorize_trigger(input_text)
 
         with self._get_conn() as conn:
-            # Get candidate patterns
-            patterns = conn.execute("""
-                SELECT * FROM learned_patterns
-                WHERE pattern_type IN ('success', 'neutral')
-                  AND confidence >= 0.3
-                ORDER BY confidence DESC, success_count DESC
-                LIMIT 100
-            """).fetchall()
+            patterns = self._match_candidates(conn, input_keywords, input_category, limit)
 
-            for row in patterns:
-                pattern = self._row_to_pattern(row)
-                match = self._compute_match(
-                    pattern, input_keywords, input_category, context
-                )
-                if match.similarity > 0.2:
-                    matches.append(match)
+        matches = [
+            self._compute_match(pattern, input_keywords, input_category, context)
+            for pattern in patterns
+        ]
 
         # Sort by score and return top matches
         matches.sort(key=lambda m: m.score, reverse=True)
         return matches[:limit]
 
+    def _match_candidates(
+        self,
+        conn: sqlite3.Connection,
+        input_keywords: List[str],
+        input_category: TriggerCategory,
+        limit: int
+    ) -> List[Pattern]:
+        """Load the patterns that can reach the top `limit` for these features, whatever the context"""
+        # Candidates need a shared keyword or the same category; any other
+        # pattern has similarity 0 and would be discarded anyway.
+        # They are gathered by index lookups (category index, keyword postings)
+        # and drive the join, so patterns sharing neither are never visited.
+        # Keyword overlap is counted in SQL from the posting table, so the
+        # Jaccard terms are computed for all candidates without decoding JSON.
+        # The input keywords are bound once, as a CTE probed by both the
+        # candidate lookup and the hit count.
+        ctes = []
+        hits_expr = "0"
+        candidate_sql = "SELECT pattern_id FROM learned_patterns WHERE trigger_category = ?"
+        params = []
+        if input_keywords:
+            rows_sql = ", ".join(["(?)"] * len(input_keywords))
+            ctes.append(f"input_keywords(keyword) AS (VALUES {rows_sql})")
+            hits_expr = """(
+                SELECT COUNT(*) FROM pattern_keywords AS pk
+                WHERE pk.pattern_id = lp.pattern_id
+                  AND pk.keyword IN input_keywords
+            )"""
+            candidate_sql += """
+                UNION
+                SELECT pattern_id FROM pattern_keywords WHERE keyword IN input_keywords"""
+            params.extend(input_keywords)
+        ctes.append(f"candidates(pattern_id) AS ({candidate_sql})")
+        params.append(input_category.value)
+
+        # Get candidate patterns, with only the columns needed for scoring.
+        # CROSS JOIN keeps the candidate set as the outer loop. Plain tuples,
+        # unpacked by position, keep sqlite3.Row lookups out of the scoring loop.
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(f"""
+            WITH {", ".join(ctes)}
+            SELECT lp.pattern_id, lp.trigger_category,
+                   lp.success_count, lp.failure_count, lp.confidence,
+                   (
+                       SELECT COUNT(*) FROM pattern_keywords AS pk
+                       WHERE pk.pattern_id = lp.pattern_id
+                   ) AS keyword_count,
+                   {hits_expr} AS hits
+            FROM candidates
+            CROSS JOIN learned_patterns AS lp ON lp.pattern_id = candidates.pattern_id
+            WHERE lp.pattern_type IN ('success', 'neutral')
+              AND lp.confidence >= 0.3
+            ORDER BY lp.confidence DESC, lp.success_count DESC
+            LIMIT 100
+        """, params).fetchall()
+
+        # Score without context; context_fit (weight 0.1, range 0-1) bounds the final score.
+        # Same arithmetic as PatternMatch.score, on plain row values.
+        # `top_lower` is a min-heap of the best `limit` lower bounds seen so far.
+        candidates = []
+        top_lower = []
+        input_size = len(input_keywords)
+        # Loop invariants bound to locals: no enum or attribute lookups per row
+        category_value = input_category.value
+        similarity_of = self._similarity
+        heappush, heappushpop = heapq.heappush, heapq.heappushpop
+        for (pattern_id, category, successes, failures, confidence,
+             keyword_count, hits) in rows:
+            # Rows arrive by confidence DESC, so once even a perfect similarity,
+            # success rate and context fit cannot reach the current top `limit`,
+            # no later row can either
+            if 0 < limit == len(top_lower) and 0.7 + 0.3 * confidence < top_lower[0]:
+                break
+
+            similarity = similarity_of(
+                hits, keyword_count, input_size,
+                (category or "unknown") == category_value,
+            )
+            if similarity > 0.2:
+                successes = successes or 0
+                uses = successes + (failures or 0)
+                success_rate = successes / uses if uses else 0.5
+                lower = (
+                    similarity * 0.4 +
+                    (confidence or 0.5) * 0.3 +
+                    success_rate * 0.2
+                )
+                candidates.append((pattern_id, lower, lower + 0.1))
+                if limit > 0:
+                    if len(top_lower) < limit:
+                        heappush(top_lower, lower)
+                    else:
+                        heappushpop(top_lower, lower)
+
+        # Drop candidates that cannot reach the top `limit` whatever their context fit
+        if 0 < limit < len(candidates):
+            threshold = top_lower[0]
+            candidates = [c for c in candidates if c[2] >= threshold]
+
+        # Fully hydrate the survivors only
+        full_rows = {}
+        sessions = {}
+        if candidates:
+            placeholders = ", ".join("?" * len(candidates))
+            full_rows = {
+                row["pattern_id"]: row
+                for row in conn.execute(f"""
+                    SELECT * FROM learned_patterns WHERE pattern_id IN ({placeholders})
+                """, [c[0] for c in candidates])
+            }
+            sessions = self._load_sessions(conn, list(full_rows))
+
+        patterns = []
+        for pattern_id, _, _ in candidates:
+            row = full_rows.get(pattern_id)
+            if row is None:     # pruned between the two queries
+                continue
+            patterns.append(self._row_to_pattern(row, sessions.get(pattern_id, [])))
+        return patterns
+
     def _compute_match(
         self,
         pattern: Pattern,
@@ -535,24 +889,15 @@ class PatternLearner:
         context: Dict[str, Any]
     ) -> PatternMatch:
         """Compute match between pattern and input"""
-        # Keyword similarity (Jaccard)
         pattern_keywords = set(pattern.trigger_keywords)
         input_kw_set = set(input_keywords)
+        intersection = pattern_keywords & input_kw_set
 
-        if pattern_keywords and input_kw_set:
-            intersection = pattern_keywords & input_kw_set
-            union = pattern_keywords | input_kw_set
-            keyword_similarity = len(intersection) / len(union)
-            matched_keywords = list(intersection)
-        else:
-            keyword_similarity = 0.0
-            matched_keywords = []
-
-        # Category match bonus
-        category_bonus = 0.3 if pattern.trigger_category == input_category else 0.0
-
-        # Combined similarity
-        similarity = min(1.0, keyword_similarity + category_bonus)
+        similarity = self._similarity(
+            len(intersection), len(pattern_keywords), len(input_kw_set),
+            pattern.trigger_category == input_category,
+        )
+        matched_keywords = list(intersection)
 
         # Context fit
         context_fit = self._compute_context_fit(pattern, context)
@@ -564,6 +909,22 @@ class PatternLearner:
             context_fit=context_fit,
         )
 
+    @staticmethod
+    def _similarity(
+        hits: int,
+        pattern_size: int,
+        input_size: int,
+        same_category: bool
+    ) -> float:
+        """Keyword Jaccard similarity from set sizes, plus category match bonus"""
+        if pattern_size and input_size:
+            keyword_similarity = hits / (pattern_size + input_size - hits)
+        else:
+            keyword_similarity = 0.0
+
+        category_bonus = 0.3 if same_category else 0.0
+        return min(1.0, keyword_similarity + category_bonus)
+
     def _compute_context_fit(
         self,
         pattern: Pattern,
@@ -620,29 +981,28 @@ class PatternLearner:
             "source": "pattern_learner",
         }
 
+    # confidence is evaluated on the pre-update counts, as before
+    _RECORD_OUTCOME_SQL = """
+        UPDATE learned_patterns SET
+            success_count = success_count + ?,
+            failure_count = failure_count + ?,
+            last_used_at = ?,
+            confidence = (success_count + 1.0) / (success_count + failure_count + 2.0)
+        WHERE pattern_id = ?
+    """
+
     def record_outcome(
         self,
         pattern_id: str,
         outcome: str  # "success" or "failure"
     ):
         """Record outcome of applying a pattern"""
+        succeeded = 1 if outcome == "success" else 0
         with self._get_conn() as conn:
-            if outcome == "success":
-                conn.execute("""
-                    UPDATE learned_patterns SET
-                        success_count = success_count + 1,
-                        last_used_at = ?,
-                        confidence = (success_count + 1.0) / (success_count + failure_count + 2.0)
-                    WHERE pattern_id = ?
-                """, (int(time.time()), pattern_id))
-            else:
-                conn.execute("""
-                    UPDATE learned_patterns SET
-                        failure_count = failure_count + 1,
-                        last_used_at = ?,
-                        confidence = (success_count + 1.0) / (success_count + failure_count + 2.0)
-                    WHERE pattern_id = ?
-                """, (int(time.time()), pattern_id))
+            conn.execute(
+                self._RECORD_OUTCOME_SQL,
+                (succeeded, 1 - succeeded, int(time.time()), pattern_id)
+            )
 
     # ==================== Failure Pattern Extraction ====================
 
@@ -650,7 +1010,7 @@ class PatternLearner:
         """Extract failure patterns to avoid"""
         patterns = []
 
-        with self._get_conn() as conn:
+        with self._get_conn(immediate=True) as conn:
             # Find repeated errors or loops in session
             decisions = conn.execute("""
                 SELECT * FROM decisions
@@ -659,18 +1019,18 @@ class PatternLearner:
             """, (session_id,)).fetchall()
 
             # Detect loops (same action repeated without progress)
-            action_counts = defaultdict(int)
-            for decision in decisions:
-                action_key = f"{decision['stage']}:{decision['outcome']}"
-                action_counts[action_key] += 1
+            action_counts = Counter(
+                f"{decision['stage']}:{decision['outcome']}" for decision in decisions
+            )
 
             # Create failure patterns for repeated actions
+            now = int(time.time())
             for action_key, count in action_counts.items():
                 if count >= 3:  # Threshold for loop detection
                     pattern = Pattern(
-                        pattern_id=str(uuid.uuid4())[:8],
+                        pattern_id=secrets.token_hex(4),
                         pattern_type=PatternType.FAILURE,
-                        trigger_signature=hashlib.md5(action_key.encode()).hexdigest()[:12],
+                        trigger_signature=_fingerprint(action_key),
                         trigger_category=TriggerCategory.LOOP,
                         trigger_keywords=[action_key.replace(":", " ").split()[0]],
                         action_template=f"Avoid repeating: {action_key}",
@@ -680,10 +1040,11 @@ class PatternLearner:
                         source_sessions=[session_id],
                         failure_count=count,
                         confidence=0.7,
-                        created_at=int(time.time()),
+                        created_at=now,
                     )
                     patterns.append(pattern)
-                    self._save_pattern(pattern)
+
+            self._save_patterns(patterns, conn)
 
         return patterns
 
@@ -695,21 +1056,21 @@ class PatternLearner:
     ) -> Dict[str, Any]:
         """Get pattern statistics"""
         with self._get_conn() as conn:
-            where_clause = ""
-            params = []
-            if pattern_type and pattern_type != "all":
-                where_clause = "WHERE pattern_type = ?"
-                params.append(pattern_type)
-
-            total = conn.execute(f"""
-                SELECT COUNT(*) as count FROM learned_patterns {where_clause}
-            """, params).fetchone()["count"]
-
+            # One index-only pass yields per-type counts plus what the
+            # (optionally type-filtered) total and average need
             by_type = conn.execute("""
-                SELECT pattern_type, COUNT(*) as count
+                SELECT pattern_type, COUNT(*) as count,
+                       COUNT(confidence) as rated, TOTAL(confidence) as confidence_sum
                 FROM learned_patterns
                 GROUP BY pattern_type
             """).fetchall()
+            selected = [
+                row for row in by_type
+                if not pattern_type or pattern_type == "all" or row["pattern_type"] == pattern_type
+            ]
+            total = sum(row["count"] for row in selected)
+            rated = sum(row["rated"] for row in selected)
+            avg_confidence = sum(row["confidence_sum"] for row in selected) / rated if rated else 0
 
             by_category = conn.execute("""
                 SELECT trigger_category, COUNT(*) as count
@@ -717,10 +1078,6 @@ class PatternLearner:
                 GROUP BY trigger_category
             """).fetchall()
 
-            avg_confidence = conn.execute(f"""
-                SELECT AVG(confidence) as avg FROM learned_patterns {where_clause}
-            """, params).fetchone()["avg"] or 0
-
             most_used = conn.execute("""
                 SELECT pattern_id, action_template, success_count, failure_count, confidence
                 FROM learned_patterns
@@ -752,11 +1109,18 @@ class PatternLearner:
         """Remove low-quality or stale patterns"""
         cutoff_time = int(time.time()) - (max_age_days * 86400)
 
+        # The OR of both conditions cannot use an index; collecting rowids
+        # per condition lets each branch seek its own partial index
         with self._get_conn() as conn:
             result = conn.execute("""
                 DELETE FROM learned_patterns
-                WHERE (confidence < ? AND (success_count + failure_count) < 5)
-                   OR (last_used_at < ? AND last_used_at > 0)
+                WHERE rowid IN (
+                    SELECT rowid FROM learned_patterns
+                    WHERE confidence < ? AND (success_count + failure_count) < 5
+                    UNION ALL
+                    SELECT rowid FROM learned_patterns
+                    WHERE last_used_at < ? AND last_used_at > 0
+                )
             """, (min_confidence, cutoff_time))
 
             return result.rowcount
@@ -769,13 +1133,156 @@ class PatternLearner:
             """, (pattern_id,)).fetchone()
 
             if row:
-                return self._row_to_pattern(row)
+                sessions = self._load_sessions(conn, [pattern_id])
+                return self._row_to_pattern(row, sessions.get(pattern_id, []))
             return None
 
 
+# Pure helpers on lowercased text and the keywords extracted from it; memoized
+# because the same previews (error banners, repeated prompts) recur across
+# decisions and match() calls
+
+@lru_cache(maxsize=4096)
+def _categorize_trigger_cached(text_lower: str) -> TriggerCategory:
+    for category, regex in PatternLearner._CATEGORY_REGEXES:
+        if regex.search(text_lower):
+            return category
+    return TriggerCategory.UNKNOWN
+
+
+@lru_cache(maxsize=4096)
+def _extract_keywords_cached(text_lower: str) -> Tuple[str, ...]:
+    # Deduplicate, preserving first-seen order; stop scanning at the
+    # keyword limit instead of tokenizing the rest of a long text
+    keywords = {}
+    for match in _KEYWORD_RE.finditer(text_lower):
+        keywords[match.group()] = None
+        if len(keywords) == MAX_KEYWORDS:
+            break
+    return tuple(keywords)
+
+
+@lru_cache(maxsize=4096)
+def _compute_signature_cached(keywords: Tuple[str, ...]) -> str:
+    # Sort keywords for stability
+    return _fingerprint("|".join(sorted(set(keywords))))
+
+
 # ==================== CLI Interface ====================
 
-def main():
+def _json_dumps(obj: Any) -> str:
+    """JSON with 2-space indent, non-ASCII kept as-is"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def _cmd_extract(learner, args):
+    """Handle extract command"""
+    # 逐个会话提取：写入需串行持有数据库写锁，共用一个连接即可
+    patterns = []
+    for session_id in args.session_id:
+        patterns.extend(learner.extract_from_session(session_id))
+    print(_json_dumps([p.to_dict() for p in patterns]))
+
+
+def _cmd_match(learner, args):
+    """Handle match command"""
+    matches = learner.match(args.input_text, limit=args.limit)
+    if matches:
+        # 输出简洁摘要供 shell 注入；直接写 UTF-8 字节，不受终端 locale 编码影响
+        summary = "\n".join(
+            f"[pattern] confidence={m.pattern.confidence:.2f} action='{m.pattern.action_template[:50]}'"
+            for m in matches[:3]
+        )
+        sys.stdout.buffer.write(summary.encode("utf-8") + b"\n")
+    # 如果需要完整 JSON，可用 --json 参数（未来扩展）
+
+
+def _cmd_learn(learner, args):
+    """Handle learn command"""
+    # 从触发文本中提取关键词作为模式；签名与存储用同一份截断后的关键词，
+    # 关键词相同的模式才会合并到同一签名下
+    keywords = learner._extract_keywords(args.trigger_text)[:10]
+    now = int(time.time())
+    pattern = Pattern(
+        pattern_id=secrets.token_hex(4),
+        pattern_type=PatternType(args.outcome),
+        trigger_signature=learner._compute_signature(keywords),
+        trigger_category=learner._categorize_trigger(args.trigger_text),
+        trigger_keywords=keywords,
+        action_type="command" if not args.action.startswith("WAIT") else "wait",
+        action_template=args.action,
+        source_sessions=[args.session_id],
+        confidence=0.5,  # 初始置信度
+        success_count=1 if args.outcome == "success" else 0,
+        failure_count=1 if args.outcome == "failure" else 0,
+        last_used_at=now,
+        created_at=now,
+    )
+    learner._save_pattern(pattern)
+    print(f"Learned pattern {pattern.pattern_id}")
+
+
+def _cmd_apply(learner, args):
+    """Handle apply command"""
+    learner.record_outcome(args.pattern_id, args.record_outcome)
+    print(f"Recorded {args.record_outcome} for pattern {args.pattern_id}")
+
+
+def _cmd_stats(learner, args):
+    """Handle stats command"""
+    stats = learner.get_stats(args.type)
+    print(_json_dumps(stats))
+
+
+def _cmd_prune(learner, args):
+    """Handle prune command"""
+    removed = learner.prune(args.min_confidence, args.max_age_days)
+    print(f"Removed {removed} patterns")
+
+
+_COMMANDS = {
+    "extract": _cmd_extract,
+    "match": _cmd_match,
+    "learn": _cmd_learn,
+    "apply": _cmd_apply,
+    "stats": _cmd_stats,
+    "prune": _cmd_prune,
+}
+
+
+def _fast_match_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """Parse the plain `match <session_id> <input_text> [--limit N]` form
+
+    Returns None for any other command line, which is left to argparse.
+    """
+    if argv[:1] != ["match"] or len(argv) not in (3, 5):
+        return None
+    if argv[1].startswith("-") or argv[2].startswith("-"):
+        return None
+
+    limit = 5
+    if len(argv) == 5:
+        if argv[3] != "--limit":
+            return None
+        try:
+            limit = int(argv[4])
+        except ValueError:
+            return None
+
+    return SimpleNamespace(
+        command="match", session_id=argv[1], input_text=argv[2], limit=limit
+    )
+
+
+def _build_parser():
+    """Build the full CLI parser"""
+    import argparse  # 仅完整 CLI 需要，match 快速路径不加载
+
     parser = argparse.ArgumentParser(
         description="Claude Monitor Pattern Learner"
     )
@@ -783,9 +1290,9 @@ def main():
 
     # extract command
     extract_parser = subparsers.add_parser(
-        "extract", help="Extract patterns from session"
+        "extract", help="Extract patterns from sessions"
     )
-    extract_parser.add_argument("session_id", help="Session ID")
+    extract_parser.add_argument("session_id", nargs="+", help="Session ID(s)")
 
     # match command
     match_parser = subparsers.add_parser(
@@ -842,59 +1349,22 @@ def main():
         help="Maximum age in days"
     )
 
-    args = parser.parse_args()
-    learner = PatternLearner()
-
-    if args.command == "extract":
-        patterns = learner.extract_from_session(args.session_id)
-        print(json.dumps([p.to_dict() for p in patterns], indent=2))
-
-    elif args.command == "match":
-        matches = learner.match(args.input_text, limit=args.limit)
-        if matches:
-            # 输出简洁摘要供 shell 注入
-            summary_parts = []
-            for m in matches[:3]:
-                summary_parts.append(f"[pattern] confidence={m.pattern.confidence:.2f} action='{m.pattern.action_template[:50]}'")
-            print("\n".join(summary_parts))
-        # 如果需要完整 JSON，可用 --json 参数（未来扩展）
-
-    elif args.command == "learn":
-        # 从触发文本中提取关键词作为模式
-        keywords = learner._extract_keywords(args.trigger_text)
-        pattern = Pattern(
-            pattern_id=str(uuid.uuid4())[:8],
-            session_id=args.session_id,
-            trigger_type="output",
-            trigger_keywords=keywords[:10],
-            trigger_signature=learner._compute_signature(args.trigger_text),
-            action_type="command" if not args.action.startswith("WAIT") else "wait",
-            action_template=args.action,
-            outcome_type=args.outcome,
-            confidence=0.5,  # 初始置信度
-            success_count=1 if args.outcome == "success" else 0,
-            failure_count=1 if args.outcome == "failure" else 0,
-            last_used_at=int(time.time()),
-            created_at=int(time.time()),
-        )
-        learner._save_pattern(pattern)
-        print(f"Learned pattern {pattern.pattern_id}")
-
-    elif args.command == "apply":
-        learner.record_outcome(args.pattern_id, args.record_outcome)
-        print(f"Recorded {args.record_outcome} for pattern {args.pattern_id}")
+    return parser
 
-    elif args.command == "stats":
-        stats = learner.get_stats(args.type)
-        print(json.dumps(stats, indent=2))
 
-    elif args.command == "prune":
-        removed = learner.prune(args.min_confidence, args.max_age_days)
-        print(f"Removed {removed} patterns")
-
-    else:
+def main():
+    # match 随每次监控事件调用，常见形式直接跳过 argparse
+    parser = None
+    args = _fast_match_args(sys.argv[1:])
+    if args is None:
+        parser = _build_parser()
+        args = parser.parse_args()
+
+    handler = _COMMANDS.get(args.command)
+    if handler is None:
         parser.print_help()
-
+        return
+    handler(PatternLearner(), args)
 
 if __name__ == "__main__":
     main()
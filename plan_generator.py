@@ -22,17 +22,29 @@ import argparse
 import json
 import os
 import re
+import secrets
 import sqlite3
 import sys
 import time
-import uuid
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import contextmanager
 from compat_dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # Database path
 DEFAULT_DB_DIR = Path.home() / ".tmux-monitor" / "memory"
 DEFAULT_DB_PATH = DEFAULT_DB_DIR / "monitor.db"
@@ -76,6 +88,40 @@ class RiskLevel(Enum):
     CRITICAL = "critical"
 
 
+# Value -> member maps; cheaper than calling the Enum class per field
+_PLAN_STATUS = {s.value: s for s in PlanStatus}
+_STEP_STATUS = {s.value: s for s in StepStatus}
+_STEP_TYPE = {t.value: t for t in StepType}
+_RISK_LEVEL = {r.value: r for r in RiskLevel}
+
+
+def _json_loads(text: str) -> Any:
+    """Parse JSON with orjson when available, falling back for NaN and the like"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def _build_risk_automaton(risk_patterns):
+    """
+    Build one Aho-Corasick automaton over all risk keywords
+
+    Risk keywords are plain substrings, so a single pass over the text finds
+    every (level, pattern) hit. Returns None when pyahocorasick is missing.
+    """
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for level, patterns in risk_patterns.items():
+        for pattern in patterns:
+            automaton.add_word(pattern, (level, pattern))
+    automaton.make_automaton()
+    return automaton
+
+
 @dataclass
 class PlanStep:
     """A step in the execution plan"""
@@ -162,15 +208,15 @@ class Plan:
 
     def get_next_step(self) -> Optional[PlanStep]:
         """Get the next pending step"""
-        for step in self.steps:
+        steps = self.steps
+        n = len(steps)
+        # Collect completed indices once instead of re-reading each
+        # dependency's status for every pending step
+        completed = {i for i, s in enumerate(steps) if s.status == StepStatus.COMPLETED}
+        for step in steps:
             if step.status == StepStatus.PENDING:
-                # Check dependencies
-                deps_met = all(
-                    self.steps[d].status == StepStatus.COMPLETED
-                    for d in step.dependencies
-                    if d < len(self.steps)
-                )
-                if deps_met:
+                # Out-of-range dependencies are ignored
+                if all(d in completed for d in step.dependencies if d < n):
                     return step
         return None
 
@@ -242,13 +288,95 @@ class PlanGenerator:
         ],
     }
 
+    # One compiled alternation per goal type, tried in declaration order
+    _GOAL_REGEXES = [
+        (goal_type, re.compile("|".join(patterns)))
+        for goal_type, patterns in GOAL_PATTERNS.items()
+    ]
+
+    # All risk patterns in one regex, one named group per (level, pattern).
+    # The alternation sits in a lookahead so every start position is tried
+    # and overlapping hits ("schemapi") are all reported; a pattern is only
+    # shadowed where an earlier-listed one matches at the same position.
+    _RISK_GROUPS = {
+        f"r{i}": (level, pattern)
+        for i, (level, pattern) in enumerate(
+            (level, pattern)
+            for level, patterns in RISK_PATTERNS.items()
+            for pattern in patterns
+        )
+    }
+    _RISK_REGEX = re.compile("(?=(?:" + "|".join(
+        f"(?P<{name}>{pattern})" for name, (_, pattern) in _RISK_GROUPS.items()
+    ) + "))")
+
+    _RISK_AUTOMATON = _build_risk_automaton(RISK_PATTERNS)
+
+    _RISK_RANK = {level: rank for rank, level in enumerate(RiskLevel)}
+
+    # Step templates by goal type: (title, description, step type), built once
+    STEP_TEMPLATES = {
+        "implement": (
+            ("Understand requirements", "Analyze what needs to be implemented", StepType.CHECK),
+            ("Design approach", "Plan the implementation approach", StepType.ACTION),
+            ("Implement core functionality", "Write the main code", StepType.ACTION),
+            ("Add error handling", "Handle edge cases and errors", StepType.ACTION),
+            ("Write tests", "Create unit/integration tests", StepType.ACTION),
+            ("Verify implementation", "Run tests and validate", StepType.CHECK),
+        ),
+        "fix": (
+            ("Reproduce issue", "Confirm the bug exists", StepType.CHECK),
+            ("Identify root cause", "Debug and find the source", StepType.ACTION),
+            ("Develop fix", "Implement the solution", StepType.ACTION),
+            ("Test fix", "Verify the fix works", StepType.CHECK),
+            ("Check for regressions", "Ensure nothing else broke", StepType.CHECK),
+        ),
+        "refactor": (
+            ("Identify scope", "Define what to refactor", StepType.CHECK),
+            ("Ensure tests exist", "Verify test coverage", StepType.CHECK),
+            ("Perform refactoring", "Make the changes", StepType.ACTION),
+            ("Run tests", "Verify nothing broke", StepType.CHECK),
+            ("Review changes", "Check code quality", StepType.CHECK),
+        ),
+        "test": (
+            ("Identify test cases", "Define what to test", StepType.ACTION),
+            ("Write test code", "Implement tests", StepType.ACTION),
+            ("Run tests", "Execute test suite", StepType.ACTION),
+            ("Analyze results", "Review test output", StepType.CHECK),
+            ("Fix failures", "Address any failures", StepType.ACTION),
+        ),
+        "deploy": (
+            ("Pre-deploy checks", "Verify readiness", StepType.CHECK),
+            ("Backup current state", "Create backup/snapshot", StepType.ACTION),
+            ("Deploy changes", "Push to target environment", StepType.ACTION),
+            ("Verify deployment", "Check deployment status", StepType.CHECK),
+            ("Post-deploy validation", "Smoke tests", StepType.CHECK),
+        ),
+        "configure": (
+            ("Review requirements", "Understand configuration needs", StepType.CHECK),
+            ("Apply configuration", "Make configuration changes", StepType.ACTION),
+            ("Verify configuration", "Test the configuration", StepType.CHECK),
+        ),
+        "document": (
+            ("Identify scope", "Determine what to document", StepType.CHECK),
+            ("Write documentation", "Create the content", StepType.ACTION),
+            ("Review for clarity", "Check readability", StepType.CHECK),
+        ),
+    }
+
+    DEFAULT_STEP_TEMPLATE = (
+        ("Analyze goal", "Understand what needs to be done", StepType.CHECK),
+        ("Execute task", "Perform the main work", StepType.ACTION),
+        ("Verify completion", "Check if goal is met", StepType.CHECK),
+    )
+
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or DB_PATH
+        self._conn = None
         self._ensure_db()
 
     def _ensure_db(self):
         """Ensure database exists with proper schema"""
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._get_conn() as conn:
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS plans (
@@ -289,49 +417,83 @@ class PlanGenerator:
                     ON plan_events(plan_id);
             """)
 
-    @contextmanager
-    def _get_conn(self):
-        """Get database connection"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10)
+    def _connect(self) -> sqlite3.Connection:
+        """Open the shared connection; transactions are managed by _get_conn"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
         conn.row_factory = sqlite3.Row
+        # WAL persists in the database file; readers no longer block the writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _get_conn(self, immediate: bool = False):
+        """Get the shared database connection inside a transaction
+
+        Nested calls join the enclosing transaction. ``immediate`` takes the
+        write lock up front for read-modify-write updates.
+        """
+        if self._conn is None:
+            self._conn = self._connect()
+        conn = self._conn
+
+        if conn.in_transaction:
+            yield conn
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
         try:
             yield conn
-            conn.commit()
-        finally:
-            conn.close()
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        # executescript() may already have committed
+        if conn.in_transaction:
+            conn.execute("COMMIT")
+
+    def close(self):
+        """Close the shared database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
     def _row_to_plan(self, row: sqlite3.Row) -> Plan:
         """Convert database row to Plan object"""
-        steps_data = json.loads(row["steps"] or "[]")
-        steps = [
-            PlanStep(
+        # Unknown enum values still raise ValueError through the Enum call
+        steps = []
+        for i, s in enumerate(_json_loads(row["steps"] or "[]")):
+            step_type = s.get("step_type", "action")
+            status = s.get("status", "pending")
+            steps.append(PlanStep(
                 step_id=s.get("step_id", ""),
                 index=s.get("index", i),
-                step_type=StepType(s.get("step_type", "action")),
+                step_type=_STEP_TYPE.get(step_type) or StepType(step_type),
                 title=s.get("title", ""),
                 description=s.get("description", ""),
                 action=s.get("action", ""),
                 expected_outcome=s.get("expected_outcome", ""),
                 dependencies=s.get("dependencies", []),
-                status=StepStatus(s.get("status", "pending")),
+                status=_STEP_STATUS.get(status) or StepStatus(status),
                 started_at=s.get("started_at"),
                 completed_at=s.get("completed_at"),
                 result=s.get("result", ""),
                 notes=s.get("notes", ""),
-            )
-            for i, s in enumerate(steps_data)
-        ]
+            ))
 
+        status = row["status"] or "draft"
+        risk_level = row["risk_level"] or "low"
         return Plan(
             plan_id=row["plan_id"],
             session_id=row["session_id"],
             goal=row["goal"],
             goal_type=row["goal_type"] or "",
-            status=PlanStatus(row["status"] or "draft"),
+            status=_PLAN_STATUS.get(status) or PlanStatus(status),
             steps=steps,
-            constraints=json.loads(row["constraints"] or "{}"),
-            risk_level=RiskLevel(row["risk_level"] or "low"),
-            risk_factors=json.loads(row["risk_factors"] or "[]"),
+            constraints=_json_loads(row["constraints"] or "{}"),
+            risk_level=_RISK_LEVEL.get(risk_level) or RiskLevel(risk_level),
+            risk_factors=_json_loads(row["risk_factors"] or "[]"),
             estimated_duration=row["estimated_duration"] or 0,
             actual_duration=row["actual_duration"] or 0,
             progress=row["progress"] or 0.0,
@@ -369,7 +531,7 @@ class PlanGenerator:
 
         # Create plan
         plan = Plan(
-            plan_id=str(uuid.uuid4())[:8],
+            plan_id=secrets.token_hex(4),
             session_id=session_id,
             goal=goal,
             goal_type=goal_type,
@@ -382,11 +544,12 @@ class PlanGenerator:
             created_at=int(time.time()),
         )
 
-        self._save_plan(plan)
-        self._log_event(plan.plan_id, "created", None, {
-            "goal": goal,
-            "step_count": len(steps),
-        })
+        with self._get_conn() as conn:
+            self._save_plan(conn, plan)
+            self._log_event(conn, plan.plan_id, "created", None, {
+                "goal": goal,
+                "step_count": len(steps),
+            })
 
         return plan
 
@@ -394,10 +557,9 @@ class PlanGenerator:
         """Analyze and categorize the goal"""
         goal_lower = goal.lower()
 
-        for goal_type, patterns in self.GOAL_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, goal_lower):
-                    return goal_type
+        for goal_type, regex in self._GOAL_REGEXES:
+            if regex.search(goal_lower):
+                return goal_type
 
         return "general"
 
@@ -408,67 +570,13 @@ class PlanGenerator:
         context: Dict[str, Any]
     ) -> List[PlanStep]:
         """Generate plan steps based on goal type"""
-        steps = []
-
-        # Common templates by goal type
-        templates = {
-            "implement": [
-                ("Understand requirements", "Analyze what needs to be implemented", StepType.CHECK),
-                ("Design approach", "Plan the implementation approach", StepType.ACTION),
-                ("Implement core functionality", "Write the main code", StepType.ACTION),
-                ("Add error handling", "Handle edge cases and errors", StepType.ACTION),
-                ("Write tests", "Create unit/integration tests", StepType.ACTION),
-                ("Verify implementation", "Run tests and validate", StepType.CHECK),
-            ],
-            "fix": [
-                ("Reproduce issue", "Confirm the bug exists", StepType.CHECK),
-                ("Identify root cause", "Debug and find the source", StepType.ACTION),
-                ("Develop fix", "Implement the solution", StepType.ACTION),
-                ("Test fix", "Verify the fix works", StepType.CHECK),
-                ("Check for regressions", "Ensure nothing else broke", StepType.CHECK),
-            ],
-            "refactor": [
-                ("Identify scope", "Define what to refactor", StepType.CHECK),
-                ("Ensure tests exist", "Verify test coverage", StepType.CHECK),
-                ("Perform refactoring", "Make the changes", StepType.ACTION),
-                ("Run tests", "Verify nothing broke", StepType.CHECK),
-                ("Review changes", "Check code quality", StepType.CHECK),
-            ],
-            "test": [
-                ("Identify test cases", "Define what to test", StepType.ACTION),
-                ("Write test code", "Implement tests", StepType.ACTION),
-                ("Run tests", "Execute test suite", StepType.ACTION),
-                ("Analyze results", "Review test output", StepType.CHECK),
-                ("Fix failures", "Address any failures", StepType.ACTION),
-            ],
-            "deploy": [
-                ("Pre-deploy checks", "Verify readiness", StepType.CHECK),
-                ("Backup current state", "Create backup/snapshot", StepType.ACTION),
-                ("Deploy changes", "Push to target environment", StepType.ACTION),
-                ("Verify deployment", "Check deployment status", StepType.CHECK),
-                ("Post-deploy validation", "Smoke tests", StepType.CHECK),
-            ],
-            "configure": [
-                ("Review requirements", "Understand configuration needs", StepType.CHECK),
-                ("Apply configuration", "Make configuration changes", StepType.ACTION),
-                ("Verify configuration", "Test the configuration", StepType.CHECK),
-            ],
-            "document": [
-                ("Identify scope", "Determine what to document", StepType.CHECK),
-                ("Write documentation", "Create the content", StepType.ACTION),
-                ("Review for clarity", "Check readability", StepType.CHECK),
-            ],
-        }
+        template = self.STEP_TEMPLATES.get(goal_type, self.DEFAULT_STEP_TEMPLATE)
+        # One random draw for all step ids, 8 hex chars each
+        ids = secrets.token_hex(4 * len(template))
 
-        template = templates.get(goal_type, [
-            ("Analyze goal", "Understand what needs to be done", StepType.CHECK),
-            ("Execute task", "Perform the main work", StepType.ACTION),
-            ("Verify completion", "Check if goal is met", StepType.CHECK),
-        ])
-
-        for i, (title, description, step_type) in enumerate(template):
-            step = PlanStep(
-                step_id=str(uuid.uuid4())[:8],
+        return [
+            PlanStep(
+                step_id=ids[i * 8:i * 8 + 8],
                 index=i,
                 step_type=step_type,
                 title=title,
@@ -478,9 +586,8 @@ class PlanGenerator:
                 dependencies=[i - 1] if i > 0 else [],
                 status=StepStatus.PENDING,
             )
-            steps.append(step)
-
-        return steps
+            for i, (title, description, step_type) in enumerate(template)
+        ]
 
     def _assess_risks(
         self,
@@ -491,19 +598,34 @@ class PlanGenerator:
         risk_factors = []
         max_risk = RiskLevel.LOW
 
-        content = goal.lower()
+        parts = [goal.lower()]
         for step in steps:
-            content += " " + step.title.lower() + " " + step.action.lower()
+            parts.append(step.title.lower())
+            parts.append(step.action.lower())
+        content = " ".join(parts)
+
+        hits = self._risk_hits(content)
+        if not hits:
+            return max_risk, risk_factors
 
+        rank = self._RISK_RANK
         for level, patterns in self.RISK_PATTERNS.items():
             for pattern in patterns:
-                if re.search(pattern, content):
+                if (level, pattern) in hits:
                     risk_factors.append(f"Contains '{pattern}' ({level.value} risk)")
-                    if list(RiskLevel).index(level) > list(RiskLevel).index(max_risk):
+                    if rank[level] > rank[max_risk]:
                         max_risk = level
 
         return max_risk, risk_factors
 
+    def _risk_hits(self, content: str) -> set:
+        """Collect the (level, pattern) pairs present in content"""
+        if self._RISK_AUTOMATON is not None:
+            return {value for _, value in self._RISK_AUTOMATON.iter(content)}
+
+        groups = self._RISK_GROUPS
+        return {groups[m.lastgroup] for m in self._RISK_REGEX.finditer(content)}
+
     def _estimate_duration(self, steps: List[PlanStep]) -> int:
         """Estimate plan duration in seconds"""
         # Simple estimation: 60 seconds per action, 30 per check
@@ -520,36 +642,51 @@ class PlanGenerator:
 
         return duration
 
-    def _save_plan(self, plan: Plan):
-        """Save plan to database"""
-        with self._get_conn() as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO plans (
-                    plan_id, session_id, goal, goal_type, status,
-                    steps, constraints, risk_level, risk_factors,
-                    estimated_duration, actual_duration, progress,
-                    created_at, started_at, completed_at,
-                    revision, parent_plan_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                plan.plan_id,
-                plan.session_id,
-                plan.goal,
-                plan.goal_type,
-                plan.status.value,
-                json.dumps([s.to_dict() for s in plan.steps]),
-                json.dumps(plan.constraints),
-                plan.risk_level.value,
-                json.dumps(plan.risk_factors),
-                plan.estimated_duration,
-                plan.actual_duration,
-                plan.progress,
-                plan.created_at,
-                plan.started_at,
-                plan.completed_at,
-                plan.revision,
-                plan.parent_plan_id,
-            ))
+    def _save_plan(self, conn: sqlite3.Connection, plan: Plan):
+        """Save plan on the caller's connection"""
+        conn.execute("""
+            INSERT OR REPLACE INTO plans (
+                plan_id, session_id, goal, goal_type, status,
+                steps, constraints, risk_level, risk_factors,
+                estimated_duration, actual_duration, progress,
+                created_at, started_at, completed_at,
+                revision, parent_plan_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            plan.plan_id,
+            plan.session_id,
+            plan.goal,
+            plan.goal_type,
+            plan.status.value,
+            json.dumps([s.to_dict() for s in plan.steps]),
+            json.dumps(plan.constraints),
+            plan.risk_level.value,
+            json.dumps(plan.risk_factors),
+            plan.estimated_duration,
+            plan.actual_duration,
+            plan.progress,
+            plan.created_at,
+            plan.started_at,
+            plan.completed_at,
+            plan.revision,
+            plan.parent_plan_id,
+        ))
+
+    def _save_step_changes(self, conn: sqlite3.Connection, plan: Plan):
+        """Write back only the columns a step update can change"""
+        conn.execute("""
+            UPDATE plans
+            SET steps = ?, progress = ?, status = ?,
+                completed_at = ?, actual_duration = ?
+            WHERE plan_id = ?
+        """, (
+            json.dumps([s.to_dict() for s in plan.steps]),
+            plan.progress,
+            plan.status.value,
+            plan.completed_at,
+            plan.actual_duration,
+            plan.plan_id,
+        ))
 
     # ==================== Plan Validation ====================
 
@@ -613,8 +750,9 @@ class PlanGenerator:
         if is_valid and plan.status == PlanStatus.DRAFT:
             plan.status = PlanStatus.ACTIVE
             plan.started_at = int(time.time())
-            self._save_plan(plan)
-            self._log_event(plan_id, "validated", None, {"is_valid": True})
+            with self._get_conn() as conn:
+                self._save_plan(conn, plan)
+                self._log_event(conn, plan_id, "validated", None, {"is_valid": True})
 
         return ValidationResult(
             is_valid=is_valid,
@@ -627,60 +765,62 @@ class PlanGenerator:
         )
 
     def _has_circular_deps(self, steps: List[PlanStep]) -> bool:
-        """Check for circular dependencies using DFS"""
-        visited = set()
-        rec_stack = set()
-
-        def dfs(step_idx: int) -> bool:
-            visited.add(step_idx)
-            rec_stack.add(step_idx)
-
-            if step_idx < len(steps):
-                for dep in steps[step_idx].dependencies:
-                    if dep not in visited:
-                        if dfs(dep):
-                            return True
-                    elif dep in rec_stack:
-                        return True
-
-            rec_stack.remove(step_idx)
-            return False
-
-        for i in range(len(steps)):
-            if i not in visited:
-                if dfs(i):
-                    return True
-
-        return False
+        """Check for circular dependencies with Kahn's topological sort"""
+        n = len(steps)
+        indegree = [0] * n
+        successors = [[] for _ in range(n)]
+        for i, step in enumerate(steps):
+            for dep in step.dependencies:
+                # Out-of-range deps are reported as invalid_dependency
+                if 0 <= dep < n:
+                    successors[dep].append(i)
+                    indegree[i] += 1
+
+        queue = deque(i for i in range(n) if indegree[i] == 0)
+        ordered = 0
+        while queue:
+            ordered += 1
+            for succ in successors[queue.popleft()]:
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    queue.append(succ)
+
+        # Steps never reaching indegree 0 sit on (or behind) a cycle
+        return ordered < n
 
     # ==================== Plan Execution ====================
 
     def get_plan(self, plan_id: str) -> Optional[Plan]:
         """Get a plan by ID"""
         with self._get_conn() as conn:
-            row = conn.execute(
-                "SELECT * FROM plans WHERE plan_id = ?",
-                (plan_id,)
-            ).fetchone()
+            return self._load_plan(conn, plan_id)
 
-            if row:
-                return self._row_to_plan(row)
-            return None
+    def _load_plan(self, conn: sqlite3.Connection, plan_id: str) -> Optional[Plan]:
+        """Load a plan on the caller's connection"""
+        row = conn.execute(
+            "SELECT * FROM plans WHERE plan_id = ?",
+            (plan_id,)
+        ).fetchone()
+
+        if row:
+            return self._row_to_plan(row)
+        return None
 
     def start_step(self, plan_id: str, step_index: int) -> Optional[PlanStep]:
         """Mark a step as started"""
-        plan = self.get_plan(plan_id)
-        if not plan or step_index >= len(plan.steps):
-            return None
-
-        step = plan.steps[step_index]
-        step.status = StepStatus.IN_PROGRESS
-        step.started_at = int(time.time())
-
-        self._save_plan(plan)
-        self._log_event(plan_id, "step_started", step_index, {
-            "step_title": step.title,
-        })
+        with self._get_conn(immediate=True) as conn:
+            plan = self._load_plan(conn, plan_id)
+            if not plan or step_index >= len(plan.steps):
+                return None
+
+            step = plan.steps[step_index]
+            step.status = StepStatus.IN_PROGRESS
+            step.started_at = int(time.time())
+
+            self._save_step_changes(conn, plan)
+            self._log_event(conn, plan_id, "step_started", step_index, {
+                "step_title": step.title,
+            })
 
         return step
 
@@ -692,74 +832,77 @@ class PlanGenerator:
         success: bool = True
     ) -> Optional[PlanStep]:
         """Mark a step as completed"""
-        plan = self.get_plan(plan_id)
-        if not plan or step_index >= len(plan.steps):
-            return None
-
-        step = plan.steps[step_index]
-        step.status = StepStatus.COMPLETED if success else StepStatus.FAILED
-        step.completed_at = int(time.time())
-        step.result = result
-
-        # Update plan progress
-        completed = sum(1 for s in plan.steps if s.status == StepStatus.COMPLETED)
-        plan.progress = completed / len(plan.steps)
-
-        # Check if plan is complete
-        if plan.progress >= 1.0:
-            plan.status = PlanStatus.COMPLETED
-            plan.completed_at = int(time.time())
-            plan.actual_duration = plan.completed_at - (plan.started_at or plan.created_at)
-
-        self._save_plan(plan)
-        self._log_event(plan_id, "step_completed", step_index, {
-            "step_title": step.title,
-            "success": success,
-            "result": result[:200],
-        })
+        with self._get_conn(immediate=True) as conn:
+            plan = self._load_plan(conn, plan_id)
+            if not plan or step_index >= len(plan.steps):
+                return None
+
+            step = plan.steps[step_index]
+            step.status = StepStatus.COMPLETED if success else StepStatus.FAILED
+            step.completed_at = int(time.time())
+            step.result = result
+
+            # Update plan progress
+            completed = sum(1 for s in plan.steps if s.status == StepStatus.COMPLETED)
+            plan.progress = completed / len(plan.steps)
+
+            # Check if plan is complete
+            if plan.progress >= 1.0:
+                plan.status = PlanStatus.COMPLETED
+                plan.completed_at = int(time.time())
+                plan.actual_duration = plan.completed_at - (plan.started_at or plan.created_at)
+
+            self._save_step_changes(conn, plan)
+            self._log_event(conn, plan_id, "step_completed", step_index, {
+                "step_title": step.title,
+                "success": success,
+                "result": result[:200],
+            })
 
         return step
 
     def skip_step(self, plan_id: str, step_index: int, reason: str = "") -> Optional[PlanStep]:
         """Skip a step"""
-        plan = self.get_plan(plan_id)
-        if not plan or step_index >= len(plan.steps):
-            return None
+        with self._get_conn(immediate=True) as conn:
+            plan = self._load_plan(conn, plan_id)
+            if not plan or step_index >= len(plan.steps):
+                return None
 
-        step = plan.steps[step_index]
-        step.status = StepStatus.SKIPPED
-        step.notes = reason
+            step = plan.steps[step_index]
+            step.status = StepStatus.SKIPPED
+            step.notes = reason
 
-        # Update progress (skipped steps count toward completion)
-        completed = sum(
-            1 for s in plan.steps
-            if s.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]
-        )
-        plan.progress = completed / len(plan.steps)
+            # Update progress (skipped steps count toward completion)
+            completed = sum(
+                1 for s in plan.steps
+                if s.status in [StepStatus.COMPLETED, StepStatus.SKIPPED]
+            )
+            plan.progress = completed / len(plan.steps)
 
-        self._save_plan(plan)
-        self._log_event(plan_id, "step_skipped", step_index, {
-            "step_title": step.title,
-            "reason": reason,
-        })
+            self._save_step_changes(conn, plan)
+            self._log_event(conn, plan_id, "step_skipped", step_index, {
+                "step_title": step.title,
+                "reason": reason,
+            })
 
         return step
 
     def block_step(self, plan_id: str, step_index: int, reason: str = "") -> Optional[PlanStep]:
         """Mark a step as blocked"""
-        plan = self.get_plan(plan_id)
-        if not plan or step_index >= len(plan.steps):
-            return None
-
-        step = plan.steps[step_index]
-        step.status = StepStatus.BLOCKED
-        step.notes = reason
-
-        self._save_plan(plan)
-        self._log_event(plan_id, "step_blocked", step_index, {
-            "step_title": step.title,
-            "reason": reason,
-        })
+        with self._get_conn(immediate=True) as conn:
+            plan = self._load_plan(conn, plan_id)
+            if not plan or step_index >= len(plan.steps):
+                return None
+
+            step = plan.steps[step_index]
+            step.status = StepStatus.BLOCKED
+            step.notes = reason
+
+            self._save_step_changes(conn, plan)
+            self._log_event(conn, plan_id, "step_blocked", step_index, {
+                "step_title": step.title,
+                "reason": reason,
+            })
 
         return step
 
@@ -780,7 +923,7 @@ class PlanGenerator:
 
         # Create new revision
         new_plan = Plan(
-            plan_id=str(uuid.uuid4())[:8],
+            plan_id=secrets.token_hex(4),
             session_id=plan.session_id,
             goal=adjustments.get("goal", plan.goal),
             goal_type=plan.goal_type,
@@ -799,7 +942,7 @@ class PlanGenerator:
         if "add_steps" in adjustments:
             for step_data in adjustments["add_steps"]:
                 step = PlanStep(
-                    step_id=str(uuid.uuid4())[:8],
+                    step_id=secrets.token_hex(4),
                     index=len(new_plan.steps),
                     step_type=StepType(step_data.get("type", "action")),
                     title=step_data.get("title", "New step"),
@@ -816,16 +959,15 @@ class PlanGenerator:
             for i, step in enumerate(new_plan.steps):
                 step.index = i
 
-        # Mark old plan as superseded
+        # Mark old plan as superseded and save the revision together
         plan.status = PlanStatus.ABANDONED
-        self._save_plan(plan)
-
-        # Save new plan
-        self._save_plan(new_plan)
-        self._log_event(new_plan.plan_id, "adjusted", None, {
-            "reason": reason,
-            "from_plan": plan_id,
-        })
+        with self._get_conn() as conn:
+            self._save_plan(conn, plan)
+            self._save_plan(conn, new_plan)
+            self._log_event(conn, new_plan.plan_id, "adjusted", None, {
+                "reason": reason,
+                "from_plan": plan_id,
+            })
 
         return new_plan
 
@@ -835,7 +977,19 @@ class PlanGenerator:
         if not plan:
             return {"error": "Plan not found"}
 
-        current = plan.get_current_step()
+        # One pass for the current step, completed count and blocked steps
+        current = None
+        steps_completed = 0
+        blocked_steps = []
+        for step in plan.steps:
+            status = step.status
+            if status == StepStatus.COMPLETED:
+                steps_completed += 1
+            elif status == StepStatus.IN_PROGRESS:
+                if current is None:
+                    current = step
+            elif status == StepStatus.BLOCKED:
+                blocked_steps.append(step.to_dict())
         next_step = plan.get_next_step()
 
         # Calculate time metrics
@@ -851,38 +1005,35 @@ class PlanGenerator:
             "progress": round(plan.progress, 3),
             "current_step": current.to_dict() if current else None,
             "next_step": next_step.to_dict() if next_step else None,
-            "steps_completed": sum(1 for s in plan.steps if s.status == StepStatus.COMPLETED),
+            "steps_completed": steps_completed,
             "steps_total": len(plan.steps),
             "elapsed_seconds": elapsed,
             "estimated_remaining": remaining,
-            "blocked_steps": [
-                s.to_dict() for s in plan.steps
-                if s.status == StepStatus.BLOCKED
-            ],
+            "blocked_steps": blocked_steps,
         }
 
     def _log_event(
         self,
+        conn: sqlite3.Connection,
         plan_id: str,
         event_type: str,
         step_index: Optional[int],
         event_data: Dict[str, Any]
     ):
-        """Log a plan event"""
-        with self._get_conn() as conn:
-            conn.execute("""
-                INSERT INTO plan_events (
-                    event_id, plan_id, event_type, step_index,
-                    event_data, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                str(uuid.uuid4())[:8],
-                plan_id,
-                event_type,
-                step_index,
-                json.dumps(event_data),
-                int(time.time()),
-            ))
+        """Log a plan event on the caller's connection"""
+        conn.execute("""
+            INSERT INTO plan_events (
+                event_id, plan_id, event_type, step_index,
+                event_data, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            secrets.token_hex(4),
+            plan_id,
+            event_type,
+            step_index,
+            json.dumps(event_data),
+            int(time.time()),
+        ))
 
     # ==================== Query Methods ====================
 
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Negotiation Dialog Tests
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from negotiation_dialog import (
+    DialogOption,
+    DialogStatus,
+    DialogType,
+    NegotiationDialog,
+)
+
+
+class TestDialogPersistence:
+    """Dialog storage tests"""
+
+    def test_json_columns_roundtrip(self, temp_db):
+        """Test options/context/response_data survive a save + load"""
+        system = NegotiationDialog(temp_db)
+        dialog = system.create(
+            "s1", DialogType.CHOICE, "Pick one",
+            options=[DialogOption("1", "First"), DialogOption("2", "Second")],
+            context={"file": "main.py", "tags": ["a", "b"]},
+        )
+
+        system.respond(dialog.dialog_id, "2", {"note": "ok"})
+        loaded = system.get(dialog.dialog_id)
+
+        assert [o.key for o in loaded.options] == ["1", "2"]
+        assert loaded.context == {"file": "main.py", "tags": ["a", "b"]}
+        assert loaded.response_data == {"note": "ok"}
+        assert loaded.status == DialogStatus.RESPONDED
+
+    def test_legacy_text_columns(self, temp_db):
+        """Test tables created with TEXT columns are still decoded"""
+        with sqlite3.connect(str(temp_db)) as conn:
+            conn.execute("""
+                CREATE TABLE dialogs (
+                    dialog_id TEXT PRIMARY KEY, session_id TEXT NOT NULL,
+                    dialog_type TEXT NOT NULL, priority TEXT DEFAULT 'medium',
+                    title TEXT, message TEXT NOT NULL, options TEXT,
+                    context TEXT, status TEXT DEFAULT 'pending',
+                    response TEXT, response_data TEXT, expires_at INTEGER,
+                    created_at INTEGER NOT NULL, responded_at INTEGER
+                )
+            """)
+
+        system = NegotiationDialog(temp_db)
+        dialog = system.confirm("s1", "Proceed?", context={"risk": "high"})
+        loaded = system.get(dialog.dialog_id)
+
+        assert [o.key for o in loaded.options] == ["y", "n"]
+        assert loaded.context == {"risk": "high"}
+        assert loaded.response_data == {}
+
+
+    def test_empty_and_corrupt_columns_default(self, temp_db):
+        """Test empty or unparsable JSON columns load as empty values"""
+        system = NegotiationDialog(temp_db)
+        dialog = system.confirm("s1", "Proceed?")
+        with sqlite3.connect(str(temp_db)) as conn:
+            conn.execute(
+                "UPDATE dialogs SET options = '', context = '{oops', response_data = NULL"
+            )
+
+        loaded = system.get(dialog.dialog_id)
+        assert loaded.options == []
+        assert loaded.context == {}
+        assert loaded.response_data == {}
+
+    def test_no_global_sqlite_adapters(self):
+        """Test importing the module leaves sqlite3 binding unchanged for other users"""
+        with sqlite3.connect(":memory:") as conn:
+            with pytest.raises(sqlite3.Error):
+                conn.execute("SELECT ?", ([1],))
+
+class TestBulkCreation:
+    """create_many and pooled access tests"""
+
+    def test_create_many_shares_timestamp(self, temp_db):
+        """Test bulk creation writes every dialog with one created_at"""
+        system = NegotiationDialog(temp_db)
+        dialogs = system.create_many([
+            {"session_id": "s1", "dialog_type": DialogType.WARNING, "message": "a"},
+            {"session_id": "s1", "dialog_type": DialogType.FEEDBACK, "message": "b",
+             "context": {"k": 1}, "timeout": 0},
+        ])
+
+        assert len({d.created_at for d in dialogs}) == 1
+        assert dialogs[1].expires_at is None
+        listed = system.list_dialogs("s1")
+        assert {d.message for d in listed} == {"a", "b"}
+        assert system.create_many([]) == []
+
+    def test_pooled_reads_and_writes(self, temp_db):
+        """Test a pooled system reads back what its writer stored"""
+        system = NegotiationDialog(temp_db, pool_size=2)
+        try:
+            dialog = system.confirm("s1", "Proceed?")
+            system.respond(dialog.dialog_id, "y")
+
+            assert system.get(dialog.dialog_id).response == "y"
+            stats = system.get_response_stats("s1")
+            assert stats["by_status"] == {"responded": 1}
+        finally:
+            system.close()
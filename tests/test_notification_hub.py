@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notification Hub Tests
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+import notification_hub
+from notification_hub import NotificationEvent, WebhookNotifier
+
+
+class _FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class _FakePool:
+    def __init__(self, status=200):
+        self.status = status
+        self.requests = []
+
+    def request(self, method, url, body=None, headers=None, retries=None):
+        self.requests.append((method, url, body, headers))
+        self.retries = retries
+        return _FakeResponse(self.status)
+
+
+@pytest.fixture
+def fake_urllib3(monkeypatch):
+    """Pretend urllib3 is installed; retries become (marker, total) tuples"""
+    monkeypatch.setattr(notification_hub, "URLLIB3_AVAILABLE", True)
+    monkeypatch.setattr(notification_hub, "_webhook_retry", lambda total: ("retry", total))
+
+
+class TestWebhookNotifier:
+    """Webhook notifier tests"""
+
+    def test_send_uses_shared_pool(self, monkeypatch, fake_urllib3):
+        """Test webhook POSTs go through the shared connection pool"""
+        pool = _FakePool()
+        monkeypatch.setattr(WebhookNotifier, "_pool", pool)
+
+        notifier = WebhookNotifier({"url": "http://example.invalid/hook"})
+        event = NotificationEvent("stuck", "Stuck", "no progress")
+
+        assert notifier.send(event) is True
+        assert WebhookNotifier({"url": "http://example.invalid/other"}).send(event)
+        assert len(pool.requests) == 2
+
+        method, url, body, headers = pool.requests[0]
+        assert method == "POST"
+        assert json.loads(body.decode("utf-8"))["event_type"] == "stuck"
+        assert headers["Content-Type"] == "application/json"
+
+    def test_send_reports_http_errors(self, monkeypatch, fake_urllib3):
+        """Test 4xx/5xx responses are reported as failures"""
+        monkeypatch.setattr(WebhookNotifier, "_pool", _FakePool(status=503))
+
+        notifier = WebhookNotifier({"url": "http://example.invalid/hook"})
+        assert notifier.send(NotificationEvent("stuck", "t", "m")) is False
+
+    def test_retry_total_from_channel_config(self, monkeypatch, fake_urllib3):
+        """Test each channel passes its own retry policy to the pool"""
+        pool = _FakePool()
+        monkeypatch.setattr(WebhookNotifier, "_pool", pool)
+
+        WebhookNotifier({"url": "http://x", "retry_total": 5}).send(NotificationEvent("stuck", "t", "m"))
+        assert pool.retries == ("retry", 5)
+
+        WebhookNotifier({"url": "http://x"}).send(NotificationEvent("stuck", "t", "m2"))
+        assert pool.retries == ("retry", notification_hub.WEBHOOK_RETRY_TOTAL)
+
+    def test_template_payload(self):
+        """Test templates substitute fields without re-parsing JSON per event"""
+        notifier = WebhookNotifier({
+            "url": "http://example.invalid/hook",
+            "template": '{"text": "[${severity}] ${title}: ${message}", '
+                        '"meta": {"type": "${event_type}", "ts": ${timestamp}, '
+                        '"ts_str": "${timestamp}"}, "tags": ["monitor"]}',
+        })
+        event = NotificationEvent("stuck", 'say "hi"', "line\nbreak")
+        event.timestamp = 1700000000
+
+        payload = notifier._render_payload(event)
+
+        assert payload == {
+            "text": '[warning] say "hi": line\nbreak',
+            "meta": {"type": "stuck", "ts": 1700000000, "ts_str": "1700000000"},
+            "tags": ["monitor"],
+        }
+
+    def test_invalid_template_falls_back(self):
+        """Test an unparsable template falls back to the default payload"""
+        notifier = WebhookNotifier({"url": "http://x", "template": "{not json"})
+        payload = notifier._render_payload(NotificationEvent("stuck", "t", "m"))
+        assert payload["source"] == "claude-monitor"
+
+
+class _RecordingNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, event):
+        self.sent.append(event)
+        return True
+
+
+@pytest.fixture
+def hub(temp_dir):
+    """Hub with a single recording channel and quiet hours disabled"""
+    config = {
+        "enabled": True,
+        "throttle_seconds": 60,
+        "quiet_hours": {"enabled": False},
+        "channels": [],
+    }
+    config_path = temp_dir / "notification.json"
+    config_path.write_text(json.dumps(config))
+
+    hub = notification_hub.NotificationHub(config_path)
+    hub.notifiers = {"recording": (_RecordingNotifier(), frozenset(["*"]), True)}
+    return hub
+
+
+class TestThrottle:
+    """Deduplication and throttling tests"""
+
+    def test_identical_events_are_deduplicated(self, hub):
+        """Test an identical payload is throttled within the window"""
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "m", context={"target": "a"}))
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "m", context={"target": "a"})) == []
+
+    def test_different_payloads_are_not_deduplicated(self, hub):
+        """Test same type/target with a different body still goes out"""
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "first", context={"target": "a"}))
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "second", context={"target": "a"}))
+
+    def test_throttle_table_is_bounded(self, hub, monkeypatch):
+        """Test the dedup table evicts the oldest entries past its cap"""
+        monkeypatch.setattr(notification_hub, "MAX_THROTTLE_ENTRIES", 3)
+        for i in range(5):
+            hub.notify_sync(NotificationEvent("stuck", "t", str(i)))
+
+        assert len(hub.last_notify_time) == 3
+        assert hub._dedup_key(NotificationEvent("stuck", "t", "0")) not in hub.last_notify_time
+
+    def test_expired_entries_are_purged(self, hub):
+        """Test entries older than the throttle window are dropped on notify"""
+        hub.notify_sync(NotificationEvent("stuck", "t", "old"))
+        old_key = hub._dedup_key(NotificationEvent("stuck", "t", "old"))
+        hub.last_notify_time[old_key]["t"] -= hub.throttle_seconds + 1
+
+        hub.notify_sync(NotificationEvent("stuck", "t", "new"))
+
+        assert old_key not in hub.last_notify_time
+        assert len(hub.last_notify_time) == 1
+
+    def test_suppressed_duplicates_are_counted(self, hub):
+        """Test throttled duplicates are reported on the next send"""
+        notifier = hub.notifiers["recording"][0]
+        for _ in range(3):
+            hub.notify_sync(NotificationEvent("stuck", "t", "m"))
+
+        key = hub._dedup_key(NotificationEvent("stuck", "t", "m"))
+        assert hub.last_notify_time[key]["n"] == 2
+
+        # Expire the window; the count survives the purge
+        hub.last_notify_time[key]["t"] -= hub.throttle_seconds + 1
+        hub.notify_sync(NotificationEvent("stuck", "t", "other"))
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "m"))
+
+        assert notifier.sent[-1].message == "m (+2 similar)"
+        assert hub.last_notify_time[key]["n"] == 0
+
+
+class TestPushGate:
+    """Score gate and rate limit tests"""
+
+    def test_no_threshold_by_default(self, hub):
+        """Test configs without score_threshold keep pushing info events"""
+        assert hub.notify_sync(NotificationEvent("task_completed", "t", "done"))
+
+    def test_low_score_events_are_gated(self, hub):
+        """Test info events fall below a configured threshold"""
+        hub.score_threshold = 0.4
+        assert hub.notify_sync(NotificationEvent("task_completed", "t", "done")) == []
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "stuck"))
+
+    def test_high_impact_bypasses_threshold(self, hub):
+        """Test critical/error events ignore the score threshold"""
+        hub.score_threshold = 2.0
+        assert hub.notify_sync(NotificationEvent("critical_error", "t", "loop"))
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "stuck")) == []
+
+    def test_force_bypasses_gate(self, hub):
+        """Test forced events skip both the score threshold and the rate limit"""
+        hub.score_threshold = 0.4
+        hub.rate_limit = 1
+        assert hub.notify_sync(NotificationEvent("stuck", "t", "stuck"))
+        assert hub.notify_sync(NotificationEvent("task_completed", "done", "m"), force=True)
+
+    def test_rate_limit_applies_to_all_severities(self, hub):
+        """Test pushes beyond the per-minute limit are dropped"""
+        hub.rate_limit = 2
+        assert hub.notify_sync(NotificationEvent("critical_error", "t", "1"))
+        assert hub.notify_sync(NotificationEvent("critical_error", "t", "2"))
+        assert hub.notify_sync(NotificationEvent("dangerous_operation", "t", "3")) == []
+
+        hub._recent_pushes[0] -= notification_hub.RATE_WINDOW_SECONDS + 1
+        assert hub.notify_sync(NotificationEvent("dangerous_operation", "t", "3"))
+
+
+class TestQuietHours:
+    """Quiet hours tests"""
+
+    def _hub(self, temp_dir, quiet):
+        config_path = temp_dir / "notification.json"
+        config_path.write_text(json.dumps({"quiet_hours": quiet, "channels": []}))
+        return notification_hub.NotificationHub(config_path)
+
+    def test_quiet_window_parsed_once(self, temp_dir):
+        """Test start/end are converted to minutes at load time"""
+        hub = self._hub(temp_dir, {"enabled": True, "start": "22:30", "end": "07:15"})
+        assert (hub._quiet_start_min, hub._quiet_end_min) == (22 * 60 + 30, 7 * 60 + 15)
+
+    def test_quiet_window_across_midnight(self, temp_dir, monkeypatch):
+        """Test a window spanning midnight covers both sides"""
+        hub = self._hub(temp_dir, {"enabled": True, "start": "23:00", "end": "08:00"})
+        for hour, expected in ((23, True), (3, True), (8, False), (12, False)):
+            monkeypatch.setattr(notification_hub.time, "localtime",
+                                lambda h=hour: type("T", (), {"tm_hour": h, "tm_min": 0})())
+            assert hub._is_quiet_hours() is expected
+
+    def test_invalid_quiet_config_disables(self, temp_dir):
+        """Test a malformed window disables quiet hours instead of raising"""
+        hub = self._hub(temp_dir, {"enabled": True, "start": "late", "end": "08:00"})
+        assert hub._is_quiet_hours() is False
+
+
+class TestDesktopNotifier:
+    """Desktop notifier tests"""
+
+    def test_linux_backend_probed_once(self, monkeypatch):
+        """Test tool discovery runs once and no `which` subprocess is spawned"""
+        probes = []
+        commands = []
+        monkeypatch.setattr(notification_hub, "JEEPNEY_AVAILABLE", False)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_linux_backend", None)
+        monkeypatch.setattr(notification_hub.shutil, "which",
+                            lambda name: probes.append(name) or "/usr/bin/notify-send")
+        monkeypatch.setattr(notification_hub.subprocess, "run",
+                            lambda cmd, **kwargs: commands.append(cmd))
+
+        notifier = notification_hub.DesktopNotifier()
+        notifier._send_linux("t", "m", "normal")
+        notifier._send_linux("t", "m", "normal")
+
+        assert probes == ["notify-send"]
+        assert [cmd[0] for cmd in commands] == ["notify-send", "notify-send"]
+
+    def test_dbus_failure_falls_back_to_subprocess(self, monkeypatch):
+        """Test an unreachable session bus is tried once, then notify-send is used"""
+        attempts = []
+        commands = []
+
+        def fail(bus):
+            attempts.append(bus)
+            raise OSError("no session bus")
+
+        monkeypatch.setattr(notification_hub, "JEEPNEY_AVAILABLE", True)
+        monkeypatch.setattr(notification_hub, "open_dbus_connection", fail, raising=False)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_dbus_conn", None)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_dbus_retry_at", 0.0)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_linux_backend", "notify-send")
+        monkeypatch.setattr(notification_hub.subprocess, "run",
+                            lambda cmd, **kwargs: commands.append(cmd))
+
+        notifier = notification_hub.DesktopNotifier()
+        notifier._send_linux("t", "m", "normal")
+        notifier._send_linux("t", "m", "normal")
+
+        assert attempts == ["SESSION"]
+        assert len(commands) == 2
+
+    def test_dbus_reconnects_after_transient_failure(self, monkeypatch):
+        """Test a failed send drops the connection and a later send reconnects"""
+        class _Conn:
+            def __init__(self, ok):
+                self.ok = ok
+                self.closed = False
+
+            def send_and_get_reply(self, msg, timeout=None):
+                if not self.ok:
+                    raise OSError("connection reset")
+
+            def close(self):
+                self.closed = True
+
+        broken = _Conn(False)
+        conns = [broken, _Conn(True)]
+        monkeypatch.setattr(notification_hub, "JEEPNEY_AVAILABLE", True)
+        monkeypatch.setattr(notification_hub, "open_dbus_connection",
+                            lambda bus: conns.pop(0), raising=False)
+        monkeypatch.setattr(notification_hub, "DBusAddress", lambda *a, **k: None, raising=False)
+        monkeypatch.setattr(notification_hub, "new_method_call", lambda *a: None, raising=False)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_dbus_conn", None)
+        monkeypatch.setattr(notification_hub.DesktopNotifier, "_dbus_retry_at", 0.0)
+
+        notifier = notification_hub.DesktopNotifier()
+        assert notifier._send_dbus("t", "m", "normal") is False
+        assert notification_hub.DesktopNotifier._dbus_conn is None
+        assert broken.closed
+
+        notification_hub.DesktopNotifier._dbus_retry_at = 0.0   # backoff elapsed
+        assert notifier._send_dbus("t", "m", "normal") is True
+        assert conns == []
+
+
+class _BatchingNotifier(_RecordingNotifier):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def send_batch(self, events):
+        self.batches.append(list(events))
+        return True
+
+
+class TestCoalescing:
+    """Burst coalescing tests"""
+
+    def test_burst_is_sent_once_per_severity(self, hub):
+        """Test queued events are grouped by channel and severity on flush"""
+        notifier = _BatchingNotifier()
+        hub.notifiers = {"desktop": (notifier, frozenset(["*"]), True)}
+        hub.coalesce_seconds = 60
+
+        assert hub.notify(NotificationEvent("stuck", "a", "1")) == ["desktop"]
+        hub.notify(NotificationEvent("human_needed", "b", "2"))
+        hub.notify(NotificationEvent("critical_error", "c", "3"))
+        hub.join()
+        assert notifier.batches == []
+
+        hub.flush()
+
+        assert [[e.title for e in batch] for batch in notifier.batches] == [["a", "b"], ["c"]]
+        assert hub._flush_timer is None
+
+    def test_sync_notify_bypasses_coalescing(self, hub):
+        """Test notify_sync has sent the event by the time it returns"""
+        notifier = _BatchingNotifier()
+        hub.notifiers = {"desktop": (notifier, frozenset(["*"]), True)}
+        hub.coalesce_seconds = 60
+
+        assert hub.notify_sync(NotificationEvent("stuck", "a", "1")) == ["desktop"]
+        assert [e.title for e in notifier.sent] == ["a"]
+        assert hub._flush_timer is None
+
+    def test_desktop_batch_merges_messages(self, monkeypatch):
+        """Test a desktop batch is delivered as a single notification"""
+        sent = []
+        notifier = notification_hub.DesktopNotifier()
+        monkeypatch.setattr(notifier, "send", lambda event: sent.append(event) or True)
+
+        notifier.send_batch([
+            NotificationEvent("stuck", "a", "1"),
+            NotificationEvent("stuck", "b", "2"),
+        ])
+
+        assert len(sent) == 1
+        assert sent[0].message == "a: 1\nb: 2"
+
+
+class TestAsyncDispatch:
+    """Background dispatch tests"""
+
+    def test_notify_returns_before_delivery(self, hub):
+        """Test notify() queues the event and the worker delivers it"""
+        notifier = hub.notifiers["recording"][0]
+
+        assert hub.notify(NotificationEvent("stuck", "t", "m")) == ["recording"]
+        hub.join()
+
+        assert [e.message for e in notifier.sent] == ["m"]
+
+    def test_notify_applies_gates_inline(self, hub):
+        """Test throttled events are rejected before reaching the queue"""
+        hub.notify(NotificationEvent("stuck", "t", "m"))
+        assert hub.notify(NotificationEvent("stuck", "t", "m")) == []
+        hub.join()
+
+        assert len(hub.notifiers["recording"][0].sent) == 1
+
+
+class TestDaemon:
+    """Unix socket daemon tests"""
+
+    def test_send_via_daemon(self, hub, temp_dir):
+        """Test requests sent over the socket are dispatched by the hub"""
+        socket_path = temp_dir / "n.sock"
+        thread = threading.Thread(target=notification_hub.serve, args=(hub, socket_path), daemon=True)
+        thread.start()
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.01)
+
+        channels = notification_hub.send_via_daemon({
+            "event_type": "stuck", "title": "t", "message": "m", "context": {}
+        }, socket_path)
+        hub.join()
+
+        assert channels == ["recording"]
+        assert [e.message for e in hub.notifiers["recording"][0].sent] == ["m"]
+
+    def test_second_serve_refuses_live_socket(self, hub, temp_dir):
+        """Test a running daemon's socket is not taken over"""
+        socket_path = temp_dir / "n.sock"
+        thread = threading.Thread(target=notification_hub.serve, args=(hub, socket_path), daemon=True)
+        thread.start()
+        for _ in range(100):
+            if notification_hub._daemon_listening(socket_path):
+                break
+            time.sleep(0.01)
+
+        with pytest.raises(RuntimeError):
+            notification_hub.serve(hub, socket_path)
+
+        # The first daemon survives the probe and keeps serving
+        assert socket_path.exists()
+        channels = notification_hub.send_via_daemon({
+            "event_type": "stuck", "title": "t", "message": "m", "context": {}
+        }, socket_path)
+        hub.join()
+        assert channels == ["recording"]
+
+    def test_stale_socket_is_replaced(self, hub, temp_dir):
+        """Test a socket file with no listener is treated as stale"""
+        socket_path = temp_dir / "n.sock"
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(socket_path))
+        stale.close()
+        assert not notification_hub._daemon_listening(socket_path)
+
+        thread = threading.Thread(target=notification_hub.serve, args=(hub, socket_path), daemon=True)
+        thread.start()
+        for _ in range(100):
+            if notification_hub._daemon_listening(socket_path):
+                break
+            time.sleep(0.01)
+
+        channels = notification_hub.send_via_daemon({
+            "event_type": "stuck", "title": "t", "message": "m", "context": {}
+        }, socket_path)
+        hub.join()
+        assert channels == ["recording"]
+
+    def test_idle_client_does_not_block_daemon(self, hub, temp_dir, monkeypatch):
+        """Test a client that never half-closes is dropped after the timeout"""
+        monkeypatch.setattr(notification_hub, "DAEMON_CONN_TIMEOUT", 0.1)
+        socket_path = temp_dir / "n.sock"
+        thread = threading.Thread(target=notification_hub.serve, args=(hub, socket_path), daemon=True)
+        thread.start()
+        for _ in range(100):
+            if notification_hub._daemon_listening(socket_path):
+                break
+            time.sleep(0.01)
+
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        idle.connect(str(socket_path))
+        idle.sendall(b'{"event_type": "stuck"')
+        try:
+            channels = notification_hub.send_via_daemon({
+                "event_type": "stuck", "title": "t", "message": "m", "context": {}
+            }, socket_path)
+        finally:
+            idle.close()
+        hub.join()
+        assert channels == ["recording"]
+
+    def test_delivered_request_is_not_resent(self, temp_dir):
+        """Test a response timeout after delivery reports the event as queued"""
+        socket_path = temp_dir / "n.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(socket_path))
+        server.listen(1)
+        try:
+            channels = notification_hub.send_via_daemon({"event_type": "stuck"}, socket_path, timeout=0.1)
+        finally:
+            server.close()
+        assert channels == [notification_hub.DAEMON_QUEUED]
+
+    def test_send_without_daemon(self, temp_dir):
+        """Test a missing socket reports the daemon as unavailable"""
+        assert notification_hub.send_via_daemon({"event_type": "stuck"}, temp_dir / "none.sock") is None
+
+
+class TestChannelFilter:
+    """Channel event filter tests"""
+
+    def test_unsubscribed_event_skips_checks(self, hub, monkeypatch):
+        """Test an event no channel wants is rejected before dedup hashing"""
+        hub.notifiers = {"recording": (_RecordingNotifier(), frozenset(["stuck"]), False)}
+        monkeypatch.setattr(hub, "_dedup_key", lambda event: pytest.fail("hashed"))
+
+        assert hub.notify_sync(NotificationEvent("goal_drift", "t", "m")) == []
+        assert hub.last_notify_time == {}
+        assert len(hub._recent_pushes) == 0
+
+
+class TestSaveConfig:
+    """Config persistence tests"""
+
+    def test_save_config_replaces_atomically(self, hub):
+        """Test the config is written via a temp file that does not linger"""
+        hub.config["throttle_seconds"] = 5
+        hub.save_config()
+
+        assert json.loads(hub.config_path.read_text())["throttle_seconds"] == 5
+        assert list(hub.config_path.parent.iterdir()) == [hub.config_path]
+
+    def test_channel_filters_compiled_at_init(self, temp_dir):
+        """Test channel event lists become frozensets with a wildcard flag"""
+        config_path = temp_dir / "notification.json"
+        config_path.write_text(json.dumps({"channels": [
+            {"type": "desktop", "enabled": True, "events": ["stuck", "stuck"]},
+            {"type": "webhook", "enabled": True, "config": {"url": "http://x"}},
+        ]}))
+        hub = notification_hub.NotificationHub(config_path)
+
+        assert hub.notifiers["desktop"][1:] == (frozenset(["stuck"]), False)
+        assert hub.notifiers["webhook"][1:] == (frozenset(["*"]), True)
+
+
+class TestCLI:
+    """Command line tests"""
+
+    def test_config_set_and_show(self, temp_dir, monkeypatch, capsys):
+        """Test config subcommands dispatch through the handler table"""
+        monkeypatch.setattr(notification_hub, "CONFIG_PATH", temp_dir / "notification.json")
+
+        assert notification_hub.main(["config", "init"]) == 0
+        assert notification_hub.main(["config", "set", "throttle_seconds", "15"]) == 0
+        assert notification_hub.main(["config", "set", "bogus", "1"]) == 1
+        capsys.readouterr()
+
+        assert notification_hub.main(["config", "show"]) == 0
+        assert json.loads(capsys.readouterr().out)["throttle_seconds"] == 15
+
+    def test_unknown_command_prints_help(self):
+        """Test running without a subcommand fails"""
+        assert notification_hub.main([]) == 1
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Output Recognizer Tests
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from output_recognizer import (
+    InteractiveType,
+    OutputRecognizer,
+    OutputType,
+    StatusType,
+    YAML_AVAILABLE,
+)
+
+
+@pytest.fixture
+def recognizer():
+    return OutputRecognizer()
+
+
+class TestProgress:
+    """Progress indicator tests"""
+
+    def test_percentage(self, recognizer):
+        assert recognizer.get_progress_percentage("Downloading... 45%") == 45.0
+
+    def test_fraction_overrides_percentage(self, recognizer):
+        progress = recognizer.parse("Processed 5/10 files, 10MB/s, eta 10s").progress
+        assert (progress.current, progress.total, progress.percentage) == (5, 10, 50.0)
+        assert progress.speed == "10MB/s"
+        assert progress.eta == "10s"
+
+    def test_bar_estimate(self, recognizer):
+        progress = recognizer.parse("[▓▓▓▓░░░░] loading").progress
+        assert progress.bar_visual == "▓▓▓▓░░░░"
+        assert progress.percentage == 50.0
+
+    def test_spinner(self, recognizer):
+        assert recognizer.parse("⠋ Building project").progress.is_spinning
+
+    @pytest.mark.parametrize("text, percentage, eta", [
+        ("剩余 30%", 30.0, "30"),
+        ("Battery remaining: 30%", 30.0, "30"),
+        ("ETA 45%", 45.0, "45"),
+    ])
+    def test_eta_does_not_consume_percentage(self, recognizer, text, percentage, eta):
+        progress = recognizer.parse(text).progress
+        assert (progress.percentage, progress.eta) == (percentage, eta)
+
+    def test_eta_does_not_consume_fraction(self, recognizer):
+        progress = recognizer.parse("remaining 3/10 files").progress
+        assert (progress.current, progress.total, progress.percentage) == (3, 10, 30.0)
+        assert progress.eta == "3"
+
+    def test_speed_after_fraction(self, recognizer):
+        progress = recognizer.parse("10/100MB/s").progress
+        assert (progress.current, progress.total) == (10, 100)
+        assert progress.speed == "100MB/s"
+
+    def test_remaining_summary(self, recognizer):
+        assert recognizer.get_status_summary("剩余 30%") == "[output] 进度: 30% | ETA: 30"
+
+    def test_no_progress(self, recognizer):
+        assert recognizer.parse("hello world").progress is None
+
+
+class TestStatus:
+    """Status indicator tests"""
+
+    def test_failure_has_priority(self, recognizer):
+        status = recognizer.parse("OK\nFAILED test_x.py::test_a\nWARNING: slow").status
+        assert status.status_type == StatusType.FAILURE
+        assert status.messages == ["FAILED test_x.py::test_a"]
+
+    def test_chinese_success(self, recognizer):
+        status = recognizer.parse("测试通过").status
+        assert status.status_type == StatusType.SUCCESS
+
+    def test_no_status(self, recognizer):
+        assert recognizer.parse("hello world").status is None
+
+    @pytest.mark.parametrize("text, count", [
+        ("[PASS] test_a", 2),
+        ("[OK] [DONE] [SUCCESS]", 6),
+    ])
+    def test_each_pattern_counts_its_own_matches(self, recognizer, text, count):
+        assert recognizer.parse(text).status.count == count
+
+    def test_messages_follow_pattern_order(self, recognizer):
+        text = "done a\n[OK] b\n成功 c\nPASSED d"
+        status = recognizer.parse(text).status
+        # Word pattern first (text order), then Chinese, then bracketed
+        assert status.messages == ["done a", "[OK] b", "PASSED d", "成功 c"]
+
+
+class TestInteractive:
+    """Interactive prompt tests"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("Do you want to continue? [y/N]", InteractiveType.CONFIRM),
+        ("1) apple\n2) banana\nPlease select:", InteractiveType.SELECT),
+        ("Enter your name:", InteractiveType.INPUT),
+        ("Enter password", InteractiveType.PASSWORD),
+        ("Press any key to continue...", InteractiveType.WAIT),
+    ])
+    def test_prompt_types(self, recognizer, text, expected):
+        assert recognizer.parse(text).interactive.interactive_type == expected
+        assert recognizer.is_waiting_input(text)
+
+    def test_select_options(self, recognizer):
+        info = recognizer.parse("1) apple\n2) banana\n3) cherry").interactive
+        assert info.options == ["apple", "banana", "cherry"]
+
+    def test_default_value(self, recognizer):
+        info = recognizer.parse("Do you want to continue? [y/N]").interactive
+        assert info.default_value == "y/N"
+
+    def test_plain_text_is_not_waiting(self, recognizer):
+        assert not recognizer.is_waiting_input("hello world")
+
+
+class TestStructured:
+    """Structured output tests"""
+
+    def test_json(self, recognizer):
+        result = recognizer.parse('{"a": 1, "b": [1, 2]}')
+        assert result.output_type == OutputType.JSON
+        assert result.structured_data == {"a": 1, "b": [1, 2]}
+
+    def test_json_outside_orjson_subset(self, recognizer):
+        result = recognizer.parse('{"big": 123456789012345678901234567890, "x": NaN}')
+        assert result.output_type == OutputType.JSON
+        assert result.structured_data["big"] == 123456789012345678901234567890
+
+    def test_embedded_json(self, recognizer):
+        result = recognizer.parse('{"x": 1} (exit 0)')
+        assert result.output_type == OutputType.JSON
+        assert result.structured_data == {"x": 1}
+
+    def test_markdown_table(self, recognizer):
+        result = recognizer.parse("| a | b |\n|---|---|\n| 1 | 2 |\n| 3 | 4 |")
+        assert result.output_type == OutputType.TABLE
+        assert result.structured_data == [{"a": "1", "b": "2"}, {"a": "3", "b": "4"}]
+
+    def test_space_table(self, recognizer):
+        result = recognizer.parse("NAME    STATUS\nfoo     Running\nbar     Pending")
+        assert result.structured_data == [
+            {"NAME": "foo", "STATUS": "Running"},
+            {"NAME": "bar", "STATUS": "Pending"},
+        ]
+
+    def test_list(self, recognizer):
+        result = recognizer.parse("- item one\n- item two\n[x] done")
+        assert result.output_type == OutputType.LIST
+        assert result.structured_data == ["item one", "item two", "done"]
+
+    @pytest.mark.skipif(not YAML_AVAILABLE, reason="PyYAML not installed")
+    def test_yaml(self, recognizer):
+        result = recognizer.parse("name: demo\nversion: 2")
+        assert result.output_type == OutputType.YAML
+        assert result.structured_data == {"name": "demo", "version": 2}
+
+    def test_invalid_yaml_value_is_plain(self, recognizer):
+        result = recognizer.parse("date: 2023-13-45\nstatus: pending")
+        assert result.output_type == OutputType.PLAIN
+
+    def test_list_items_do_not_span_lines(self, recognizer):
+        assert recognizer.parse("-\nfoo\n-\nbar").output_type == OutputType.PLAIN
+
+    def test_summary(self, recognizer):
+        summary = recognizer.get_status_summary("[=====>    ] 50% ETA: 2m\nDone? [y/n]")
+        assert summary.startswith("[output] 进度: 50%")
+        assert "ETA: 2m" in summary
+
+
+class TestScanWindow:
+    """Bounded scan window tests"""
+
+    def test_only_tail_is_scanned(self):
+        text = "FAILED early\n" + "x" * 200 + "\nall good"
+        assert OutputRecognizer(max_scan=50).parse(text).status is None
+        assert OutputRecognizer(max_scan=None).parse(text).status.status_type == StatusType.FAILURE
+
+    def test_window_starts_at_line_boundary(self):
+        text = "x" * 100 + " PASSED\nnext line"
+        assert OutputRecognizer(max_scan=20).parse(text).status is None
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pattern Learner Tests
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+from memory.database import Database
+from memory.decision_recorder import DecisionRecorder
+from memory.session_manager import SessionManager
+import pattern_learner
+from pattern_learner import PatternLearner, PatternType, TriggerCategory
+
+
+@pytest.fixture
+def learner(temp_db):
+    Database(temp_db)
+    learner = PatternLearner(temp_db)
+    yield learner
+    learner.close()
+
+
+@pytest.fixture
+def session(temp_db):
+    db = Database(temp_db)
+    session_id = SessionManager(db).start_session("test:pane", "/tmp/test")
+    return session_id, DecisionRecorder(db)
+
+
+class TestCategorize:
+    """Trigger categorization tests"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("Traceback: ValueError raised", TriggerCategory.ERROR),
+        ("connection error while fetching", TriggerCategory.ERROR),
+        ("connection refused by host", TriggerCategory.NETWORK),
+        ("All tests passed", TriggerCategory.COMPLETION),
+        ("Permission denied", TriggerCategory.PERMISSION),
+        ("hello there", TriggerCategory.UNKNOWN),
+    ])
+    def test_categories(self, learner, text, expected):
+        assert learner._categorize_trigger(text) == expected
+
+
+class TestExtraction:
+    """Pattern extraction tests"""
+
+    def test_extract_from_session(self, learner, session):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "npm install",
+                                 "command", "Error: module lodash not found")
+        recorder.record_decision(session_id, "coding", "monitor", "WAIT",
+                                 "wait", "installing packages")
+
+        patterns = learner.extract_from_session(session_id)
+        assert len(patterns) == 2
+        assert all(p.pattern_type == PatternType.SUCCESS for p in patterns)
+        assert learner.get_stats()["total_patterns"] == 2
+
+    def test_failure_patterns(self, learner, session):
+        session_id, recorder = session
+        for _ in range(3):
+            recorder.record_decision(session_id, "testing", "monitor", "retry",
+                                     "nudge", "same error again")
+
+        patterns = learner.extract_failure_patterns(session_id)
+        assert len(patterns) == 1
+        assert patterns[0].trigger_category == TriggerCategory.LOOP
+        assert patterns[0].failure_count == 3
+
+
+class TestMatching:
+    """Pattern matching tests"""
+
+    def test_match_and_record_outcome(self, learner, session):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "npm install lodash",
+                                 "command", "Error: module lodash not found")
+        recorder.record_decision(session_id, "coding", "monitor", "WAIT",
+                                 "wait", "installing")
+        learner.extract_from_session(session_id)
+
+        matches = learner.match("Error: module lodash not found in project")
+        assert matches
+        best = matches[0]
+        assert best.pattern.action_template == "npm install lodash"
+        assert "lodash" in best.matched_keywords
+
+        learner.record_outcome(best.pattern.pattern_id, "success")
+        updated = learner.get_pattern(best.pattern.pattern_id)
+        assert updated.success_count == best.pattern.success_count + 1
+
+    def test_no_match(self, learner):
+        assert learner.match("nothing learned yet") == []
+
+
+class TestKeywordIndex:
+    """Keyword posting table tests"""
+
+    def _postings(self, learner):
+        with learner._get_conn() as conn:
+            return {(r["keyword"], r["pattern_id"])
+                    for r in conn.execute("SELECT * FROM pattern_keywords")}
+
+    def test_saved_patterns_are_indexed(self, learner, session):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "npm install",
+                                 "wait", "module lodash missing")
+        pattern = learner.extract_from_session(session_id)[0]
+
+        assert ("lodash", pattern.pattern_id) in self._postings(learner)
+
+        learner.prune(min_confidence=1.0)
+        assert self._postings(learner) == set()
+
+    def test_backfill_existing_patterns(self, learner, session, temp_db):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "npm install",
+                                 "wait", "module lodash missing")
+        pattern = learner.extract_from_session(session_id)[0]
+        with learner._get_conn() as conn:
+            conn.execute("DROP TABLE pattern_keywords")
+
+        reopened = PatternLearner(temp_db)
+        assert ("lodash", pattern.pattern_id) in self._postings(reopened)
+
+
+class TestSavePatterns:
+    """Batched pattern upsert tests"""
+
+    def test_repeated_extraction_accumulates_counts(self, learner, session):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "WAIT",
+                                 "wait", "build running")
+
+        first = learner.extract_from_session(session_id)[0]
+        learner.extract_from_session(session_id)
+
+        stored = learner.get_pattern(first.pattern_id)
+        assert stored.success_count == 2
+        assert learner.get_stats()["total_patterns"] == 1
+
+    def test_legacy_duplicate_signatures_are_folded(self, learner, temp_db):
+        with learner._get_conn() as conn:
+            conn.execute("DROP INDEX idx_patterns_signature_unique")
+            for pattern_id, successes in (("a", 1), ("b", 2)):
+                conn.execute("""
+                    INSERT INTO learned_patterns
+                        (pattern_id, pattern_type, trigger_signature, success_count, created_at)
+                    VALUES (?, 'success', 'sig', ?, 0)
+                """, (pattern_id, successes))
+
+        reopened = PatternLearner(temp_db)
+        assert reopened.get_pattern("b") is None
+        assert reopened.get_pattern("a").success_count == 3
+
+    def _seed_legacy_duplicates(self, learner):
+        with learner._get_conn() as conn:
+            conn.execute("DROP INDEX idx_patterns_signature_unique")
+            conn.execute("DROP TABLE pattern_sessions")
+            for pattern_id, successes, failures, sessions in (
+                ("a", 1, 0, '["s1"]'),
+                ("b", 2, 1, '["s2", "s1"]'),
+                ("c", 3, 0, '["s3"]'),
+            ):
+                conn.execute("""
+                    INSERT INTO learned_patterns
+                        (pattern_id, pattern_type, trigger_signature, success_count,
+                         failure_count, confidence, source_sessions, created_at)
+                    VALUES (?, 'success', 'sig', ?, ?, 0.5, ?, 0)
+                """, (pattern_id, successes, failures, sessions))
+
+    def test_fold_merges_sessions_and_confidence(self, learner, temp_db):
+        self._seed_legacy_duplicates(learner)
+
+        reopened = PatternLearner(temp_db)
+        kept = reopened.get_pattern("a")
+        assert reopened.get_pattern("b") is None
+        assert reopened.get_pattern("c") is None
+        assert (kept.success_count, kept.failure_count) == (6, 1)
+        assert sorted(kept.source_sessions) == ["s1", "s2", "s3"]
+        assert kept.confidence == reopened._compute_confidence(kept)
+        reopened.close()
+
+    def test_interrupted_fold_is_rolled_back(self, learner, temp_db, monkeypatch):
+        self._seed_legacy_duplicates(learner)
+        learner.close()
+
+        def interrupted(self, conn):
+            conn.execute("UPDATE learned_patterns SET success_count = 100")
+            raise KeyboardInterrupt
+
+        with monkeypatch.context() as m:
+            m.setattr(PatternLearner, "_fold_duplicate_signatures", interrupted)
+            with pytest.raises(KeyboardInterrupt):
+                PatternLearner(temp_db).get_pattern("a")
+
+        reopened = PatternLearner(temp_db)
+        assert reopened.get_pattern("a").success_count == 6
+        reopened.close()
+
+    def test_stale_schema_probe_is_rechecked(self, learner, temp_db, monkeypatch):
+        self._seed_legacy_duplicates(learner)
+        learner.close()
+        PatternLearner(temp_db).close()   # another process migrates first
+
+        # This open probed the schema before that migration committed
+        probes = []
+        real_probe = PatternLearner._schema_objects
+
+        def stale_probe(conn):
+            probes.append(conn)
+            return set() if len(probes) == 1 else real_probe(conn)
+
+        monkeypatch.setattr(PatternLearner, "_schema_objects", staticmethod(stale_probe))
+        reopened = PatternLearner(temp_db)
+        kept = reopened.get_pattern("a")
+        assert (kept.success_count, kept.failure_count) == (6, 1)
+        assert sorted(kept.source_sessions) == ["s1", "s2", "s3"]
+        reopened.close()
+
+    def test_source_sessions_accumulate(self, learner, temp_db):
+        db = Database(temp_db)
+        recorder = DecisionRecorder(db)
+        patterns = []
+        for target in ("a:pane", "b:pane"):
+            session_id = SessionManager(db).start_session(target, "/tmp/test")
+            recorder.record_decision(session_id, "coding", "monitor", "WAIT",
+                                     "wait", "build running")
+            patterns.extend(learner.extract_from_session(session_id))
+
+        stored = learner.get_pattern(patterns[0].pattern_id)
+        assert len(stored.source_sessions) == 2
+
+    def test_legacy_source_sessions_are_migrated(self, learner, temp_db):
+        with learner._get_conn() as conn:
+            conn.execute("DROP TABLE pattern_sessions")
+            conn.execute("""
+                INSERT INTO learned_patterns
+                    (pattern_id, pattern_type, trigger_signature, source_sessions, created_at)
+                VALUES ('a', 'success', 'sig', '["s1", "s2"]', 0)
+            """)
+
+        reopened = PatternLearner(temp_db)
+        assert sorted(reopened.get_pattern("a").source_sessions) == ["s1", "s2"]
+
+
+class TestPrune:
+    """Pruning tests"""
+
+    def _insert(self, learner, pattern_id, confidence, uses, last_used_at):
+        with learner._get_conn() as conn:
+            conn.execute("""
+                INSERT INTO learned_patterns
+                    (pattern_id, pattern_type, trigger_signature, success_count,
+                     confidence, last_used_at, created_at)
+                VALUES (?, 'success', ?, ?, ?, ?, 0)
+            """, (pattern_id, pattern_id, uses, confidence, last_used_at))
+
+    def test_prune_counts_each_pattern_once(self, learner):
+        self._insert(learner, "weak", 0.1, 1, None)
+        self._insert(learner, "stale", 0.9, 10, 1)
+        self._insert(learner, "both", 0.1, 1, 1)
+        self._insert(learner, "kept", 0.1, 10, None)
+
+        assert learner.prune(min_confidence=0.3, max_age_days=1) == 3
+        assert learner.get_pattern("kept") is not None
+        assert learner.get_pattern("both") is None
+
+
+class TestStats:
+    """Statistics tests"""
+
+    def test_type_filter_applies_to_total_and_average(self, learner):
+        with learner._get_conn() as conn:
+            for pattern_id, pattern_type, confidence in (
+                ("a", "success", 0.8), ("b", "success", None), ("c", "failure", 0.2),
+            ):
+                conn.execute("""
+                    INSERT INTO learned_patterns
+                        (pattern_id, pattern_type, trigger_signature, action_template,
+                         confidence, created_at)
+                    VALUES (?, ?, ?, 'retry', ?, 0)
+                """, (pattern_id, pattern_type, pattern_id, confidence))
+
+        stats = learner.get_stats("success")
+        assert stats["total_patterns"] == 2
+        assert stats["average_confidence"] == 0.8
+        assert stats["by_type"] == {"success": 2, "failure": 1}
+        assert learner.get_stats()["average_confidence"] == 0.5
+
+
+class TestConnection:
+    """Shared connection tests"""
+
+    def test_connection_is_reused(self, learner):
+        with learner._get_conn() as first:
+            pass
+        with learner._get_conn() as second:
+            assert second is first
+
+    def test_failed_block_rolls_back(self, learner):
+        with pytest.raises(RuntimeError):
+            with learner._get_conn() as conn:
+                conn.execute("""
+                    INSERT INTO learned_patterns
+                        (pattern_id, pattern_type, trigger_signature, created_at)
+                    VALUES ('p1', 'success', 'sig', 0)
+                """)
+                raise RuntimeError("boom")
+
+        assert learner.get_pattern("p1") is None
+        with learner._get_conn() as conn:
+            assert not conn.execute("SELECT 1 FROM learned_patterns").fetchall()
+
+    def test_database_opened_on_first_use(self, temp_dir):
+        db_path = temp_dir / "memory" / "patterns.db"
+        learner = PatternLearner(db_path)
+        assert not db_path.exists()
+
+        assert learner.get_stats()["total_patterns"] == 0
+        assert db_path.exists()
+        learner.close()
+
+    def test_close_reopens_lazily(self, learner):
+        learner.get_stats()
+        learner.close()
+        assert learner.get_stats()["total_patterns"] == 0
+
+
+class TestIndexes:
+    """Query plan tests"""
+
+    def test_match_query_uses_ordered_index(self, learner):
+        with learner._get_conn() as conn:
+            plan = [row[3] for row in conn.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT pattern_id FROM learned_patterns INDEXED BY idx_patterns_match
+                WHERE pattern_type IN ('success', 'neutral') AND confidence >= 0.3
+                ORDER BY confidence DESC, success_count DESC
+                LIMIT 100
+            """)]
+        # INDEXED BY fails if the partial index cannot serve this WHERE clause
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+    @pytest.mark.parametrize("condition,index", [
+        ("confidence < 0.3 AND (success_count + failure_count) < 5", "idx_prune_weak"),
+        ("last_used_at < 100 AND last_used_at > 0", "idx_prune_stale"),
+    ])
+    def test_prune_deletes_use_partial_indexes(self, learner, condition, index):
+        with learner._get_conn() as conn:
+            plan = " ".join(row[3] for row in conn.execute(
+                f"EXPLAIN QUERY PLAN DELETE FROM learned_patterns WHERE {condition}"
+            ))
+        assert index in plan
+
+
+class TestCli:
+    """Command line interface tests"""
+
+    @pytest.fixture
+    def run(self, monkeypatch, temp_db, capsys):
+        monkeypatch.setattr(pattern_learner, "DB_PATH", temp_db)
+
+        def run(*argv):
+            monkeypatch.setattr(sys, "argv", ["pattern_learner.py", *argv])
+            pattern_learner.main()
+            return capsys.readouterr().out
+        return run
+
+    def test_learn_signs_keywords(self, run, temp_db):
+        run("learn", "s1", "npm ERR! module lodash not found", "npm install lodash", "success")
+        run("learn", "s2", "module lodash not found (npm ERR!)", "npm install lodash", "success")
+
+        learner = PatternLearner(temp_db)
+        stats = learner.get_stats()
+        learner.close()
+        assert stats["total_patterns"] == 1
+        assert stats["by_category"] == {"dependency": 1}
+        assert stats["most_used"][0]["uses"] == 2
+
+    def test_learn_signs_stored_keywords(self, run, temp_db):
+        text = " ".join(f"word{i:02d}" for i in range(15))
+        run("learn", "s1", text, "WAIT", "neutral")
+
+        learner = PatternLearner(temp_db)
+        with learner._get_conn() as conn:
+            row = conn.execute(
+                "SELECT trigger_signature, trigger_keywords FROM learned_patterns"
+            ).fetchone()
+        stored = json.loads(row["trigger_keywords"])
+        assert len(stored) == 10
+        assert row["trigger_signature"] == learner._compute_signature(stored)
+        learner.close()
+
+    def test_extract_prints_json(self, run, session):
+        session_id, recorder = session
+        recorder.record_decision(session_id, "coding", "monitor", "重新运行测试",
+                                 "wait", "module lodash missing")
+
+        patterns = json.loads(run("extract", session_id))
+        assert patterns[0]["action_template"] == "重新运行测试"
+        assert patterns[0]["source_sessions"] == [session_id]
+
+    def test_extract_multiple_sessions(self, run, temp_db):
+        db = Database(temp_db)
+        recorder = DecisionRecorder(db)
+        session_ids = []
+        for target, preview in (("a:pane", "module lodash missing"), ("b:pane", "connection timeout")):
+            session_id = SessionManager(db).start_session(target, "/tmp/test")
+            recorder.record_decision(session_id, "coding", "monitor", "WAIT", "wait", preview)
+            session_ids.append(session_id)
+
+        patterns = json.loads(run("extract", *session_ids))
+        assert [p["source_sessions"] for p in patterns] == [[sid] for sid in session_ids]
+
+    def test_stats_prints_json(self, run):
+        run("learn", "s1", "module lodash not found", "安装依赖", "success")
+
+        stats = json.loads(run("stats"))
+        assert stats["total_patterns"] == 1
+        assert stats["most_used"][0]["action"] == "安装依赖"
+
+    @pytest.mark.parametrize("argv", [
+        ["match", "s1", "module lodash not found"],
+        ["match", "s1", "module lodash not found", "--limit", "3"],
+    ])
+    def test_fast_match_args_agree_with_argparse(self, argv):
+        fast = pattern_learner._fast_match_args(argv)
+        assert vars(fast) == vars(pattern_learner._build_parser().parse_args(argv))
+
+    @pytest.mark.parametrize("argv", [
+        [],
+        ["stats"],
+        ["match", "s1"],
+        ["match", "s1", "-rw-r--r-- file"],
+        ["match", "s1", "text", "--limit=3"],
+        ["match", "s1", "text", "--limit", "many"],
+    ])
+    def test_fast_match_args_defer_other_forms(self, argv):
+        assert pattern_learner._fast_match_args(argv) is None
+
+    def test_match_prints_summary(self, run):
+        run("learn", "s1", "module lodash not found", "npm install lodash", "success")
+
+        out = run("match", "s1", "module lodash not found", "--limit", "1")
+        assert out == "[pattern] confidence=0.50 action='npm install lodash'\n"
+
+    def test_match_summary_is_utf8(self, run):
+        run("learn", "s1", "module lodash not found", "安装依赖", "success")
+
+        out = run("match", "s1", "module lodash not found")
+        assert out == "[pattern] confidence=0.50 action='安装依赖'\n"
+
+    @pytest.mark.skipif(not pattern_learner.ORJSON_AVAILABLE, reason="orjson not installed")
+    def test_json_output_matches_stdlib(self):
+        obj = {"a": [1, 2.5, None], "b": {"c": "重试"}}
+        assert pattern_learner._json_dumps(obj) == json.dumps(obj, indent=2, ensure_ascii=False)
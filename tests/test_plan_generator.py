@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Plan Generator Tests
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+
+import plan_generator
+from plan_generator import Plan, PlanGenerator, PlanStep, RiskLevel, StepStatus
+
+
+@pytest.fixture
+def generator(temp_db):
+    generator = PlanGenerator(temp_db)
+    yield generator
+    generator.close()
+
+
+class TestGoalType:
+    """Goal classification tests"""
+
+    def test_english_goal(self, generator):
+        assert generator._analyze_goal_type("Fix the login crash") == "fix"
+
+    def test_chinese_goal(self, generator):
+        assert generator._analyze_goal_type("部署到测试环境") == "test"
+
+    def test_first_declared_type_wins(self, generator):
+        # "add" (implement) is declared before "test"
+        assert generator._analyze_goal_type("add test coverage") == "implement"
+
+    def test_unknown_goal(self, generator):
+        assert generator._analyze_goal_type("ponder life") == "general"
+
+
+class TestRiskAssessment:
+    """Risk assessment tests"""
+
+    def test_factors_in_declaration_order(self, generator):
+        steps = generator._generate_steps("x", "general", {})
+        level, factors = generator._assess_risks(
+            "update auth and drop the production table", steps
+        )
+        assert level == RiskLevel.CRITICAL
+        assert factors == [
+            "Contains 'production' (critical risk)",
+            "Contains 'drop' (critical risk)",
+            "Contains 'auth' (high risk)",
+            "Contains 'update' (medium risk)",
+        ]
+
+    def test_overlapping_patterns_all_reported(self, generator):
+        level, factors = generator._assess_risks("schemapi", [])
+        assert level == RiskLevel.HIGH
+        assert factors == [
+            "Contains 'schema' (high risk)",
+            "Contains 'api' (high risk)",
+        ]
+
+    def test_low_risk(self, generator):
+        assert generator._assess_risks("read a book", []) == (RiskLevel.LOW, [])
+
+    def test_combined_regex_reports_every_pattern(self, generator, monkeypatch):
+        # No pattern may be shadowed by an earlier one starting at the same spot
+        monkeypatch.setattr(PlanGenerator, "_RISK_AUTOMATON", None)
+        for level, patterns in PlanGenerator.RISK_PATTERNS.items():
+            for pattern in patterns:
+                assert (level, pattern) in generator._risk_hits(f"x{pattern}x")
+
+    @pytest.mark.skipif(not plan_generator.AHOCORASICK_AVAILABLE,
+                        reason="pyahocorasick not installed")
+    def test_automaton_matches_regex_fallback(self, generator, monkeypatch):
+        content = "sudo deploy the third-party schemapi, then remove root"
+        with_automaton = generator._risk_hits(content)
+        monkeypatch.setattr(PlanGenerator, "_RISK_AUTOMATON", None)
+        assert generator._risk_hits(content) == with_automaton
+
+
+class TestCircularDeps:
+    """Dependency cycle detection tests"""
+
+    @staticmethod
+    def _steps(deps):
+        return [PlanStep(index=i, dependencies=d) for i, d in enumerate(deps)]
+
+    def test_chain_has_no_cycle(self, generator):
+        assert not generator._has_circular_deps(self._steps([[], [0], [1]]))
+
+    def test_cycle_detected(self, generator):
+        assert generator._has_circular_deps(self._steps([[2], [0], [1]]))
+
+    def test_self_dependency(self, generator):
+        assert generator._has_circular_deps(self._steps([[], [1]]))
+
+    def test_out_of_range_dependency_ignored(self, generator):
+        assert not generator._has_circular_deps(self._steps([[5], [0]]))
+
+    def test_long_chain_does_not_recurse(self, generator):
+        deps = [[i - 1] if i else [] for i in range(5000)]
+        assert not generator._has_circular_deps(self._steps(deps))
+
+
+class TestNextStep:
+    """Next executable step tests"""
+
+    @staticmethod
+    def _plan(deps, statuses):
+        return Plan(steps=[
+            PlanStep(index=i, dependencies=d, status=st)
+            for i, (d, st) in enumerate(zip(deps, statuses))
+        ])
+
+    def test_waits_for_dependencies(self):
+        plan = self._plan(
+            [[], [0], []],
+            [StepStatus.IN_PROGRESS, StepStatus.PENDING, StepStatus.PENDING],
+        )
+        assert plan.get_next_step().index == 2
+
+    def test_skipped_dependency_does_not_count(self):
+        plan = self._plan([[], [0]], [StepStatus.SKIPPED, StepStatus.PENDING])
+        assert plan.get_next_step() is None
+
+    def test_out_of_range_dependency_ignored(self):
+        plan = self._plan([[], [7]], [StepStatus.COMPLETED, StepStatus.PENDING])
+        assert plan.get_next_step().index == 1
+
+
+class TestGenerate:
+    """Plan generation tests"""
+
+    def test_generate_and_reload(self, generator):
+        plan = generator.generate("sess-1", "Implement retry logic")
+        loaded = generator.get_plan(plan.plan_id)
+        assert loaded.to_dict() == plan.to_dict()
+        assert loaded.goal_type == "implement"
+        assert len(loaded.steps) == 6
+
+    def test_steps_follow_template(self, generator):
+        steps = generator._generate_steps("x", "configure", {})
+        assert [s.title for s in steps] == [
+            "Review requirements", "Apply configuration", "Verify configuration",
+        ]
+        assert [s.dependencies for s in steps] == [[], [0], [1]]
+
+    def test_unknown_type_uses_default_template(self, generator):
+        steps = generator._generate_steps("x", "general", {})
+        assert steps[0].title == "Analyze goal"
+
+    def test_ids_are_eight_hex_chars(self, generator):
+        plan = generator.generate("sess-1", "Implement retry logic")
+        ids = [plan.plan_id] + [s.step_id for s in plan.steps]
+        assert all(len(i) == 8 and int(i, 16) >= 0 for i in ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_generated_steps_are_independent(self, generator):
+        first = generator._generate_steps("x", "fix", {})
+        second = generator._generate_steps("x", "fix", {})
+        first[1].dependencies.append(5)
+        assert second[1].dependencies == [0]
+
+
+class TestRowToPlan:
+    """Row decoding tests"""
+
+    def test_round_trip_with_unicode(self, generator):
+        plan = generator.generate("sess-1", "修复登录 bug", {"limit": 3, "tags": ["ci"]})
+        loaded = generator.get_plan(plan.plan_id)
+        assert loaded.to_dict() == plan.to_dict()
+
+    def test_nan_constraint_falls_back_to_stdlib(self, generator):
+        plan = generator.generate("sess-1", "Fix it", {"ratio": float("nan")})
+        loaded = generator.get_plan(plan.plan_id)
+        assert loaded.constraints["ratio"] != loaded.constraints["ratio"]
+
+    def test_unknown_status_raises(self, generator):
+        plan = generator.generate("sess-1", "Fix it")
+        with generator._get_conn() as conn:
+            conn.execute("UPDATE plans SET status = 'bogus' WHERE plan_id = ?", (plan.plan_id,))
+        with pytest.raises(ValueError):
+            generator.get_plan(plan.plan_id)
+
+
+class TestStepUpdates:
+    """Step lifecycle persistence tests"""
+
+    def test_step_events_logged(self, generator):
+        plan = generator.generate("sess-1", "Fix flaky upload")
+        generator.start_step(plan.plan_id, 0)
+        generator.complete_step(plan.plan_id, 0, "reproduced")
+        generator.skip_step(plan.plan_id, 1, "known cause")
+
+        events = [e["event_type"] for e in generator.get_plan_history(plan.plan_id)]
+        assert events == ["created", "step_started", "step_completed", "step_skipped"]
+        assert generator.get_plan(plan.plan_id).progress == pytest.approx(2 / 5)
+
+    def test_completing_all_steps_completes_plan(self, generator):
+        plan = generator.generate("sess-1", "Configure CI", {"branch": "main"})
+        generator.validate(plan.plan_id)
+        for i in range(len(plan.steps)):
+            generator.complete_step(plan.plan_id, i, "ok")
+
+        loaded = generator.get_plan(plan.plan_id)
+        assert loaded.status.value == "completed"
+        assert loaded.progress == 1.0
+        assert loaded.completed_at is not None
+        assert loaded.constraints == {"branch": "main"}
+        assert loaded.started_at is not None
+
+    def test_plan_and_event_commit_together(self, generator, monkeypatch):
+        plan = generator.generate("sess-1", "Fix flaky upload")
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("event write failed")
+
+        monkeypatch.setattr(generator, "_log_event", fail)
+        with pytest.raises(RuntimeError):
+            generator.complete_step(plan.plan_id, 0)
+
+        assert generator.get_plan(plan.plan_id).steps[0].status.value == "pending"
+
+
+class TestTrack:
+    """Plan tracking tests"""
+
+    def test_track_summary(self, generator):
+        plan = generator.generate("sess-1", "Fix flaky upload")
+        generator.complete_step(plan.plan_id, 0)
+        generator.start_step(plan.plan_id, 1)
+        generator.block_step(plan.plan_id, 3, "waiting on review")
+
+        tracking = generator.track(plan.plan_id)
+        assert tracking["steps_completed"] == 1
+        assert tracking["steps_total"] == 5
+        assert tracking["current_step"]["index"] == 1
+        assert tracking["next_step"] is None
+        assert [s["index"] for s in tracking["blocked_steps"]] == [3]
+
+    def test_missing_plan(self, generator):
+        assert generator.track("nope") == {"error": "Plan not found"}
+
+
+class TestConnection:
+    """Shared connection tests"""
+
+    def test_wal_mode(self, generator):
+        with generator._get_conn() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_connection_reused(self, generator):
+        with generator._get_conn() as first:
+            pass
+        with generator._get_conn() as second:
+            assert second is first
+
+    def test_nested_calls_share_transaction(self, generator):
+        with generator._get_conn() as outer:
+            with generator._get_conn() as inner:
+                assert inner is outer
+            assert outer.in_transaction
+        assert not outer.in_transaction
+
+    def test_close_and_reopen(self, generator):
+        plan = generator.generate("sess-1", "Write docs")
+        generator.close()
+        assert generator._conn is None
+        assert generator.get_plan(plan.plan_id).goal == "Write docs"